@@ -1,10 +1,12 @@
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# Always resolve .env relative to this file (backend/app/config.py → backend/.env)
-_ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
+# Always locate .env relative to this file (backend/app/config.py → backend/.env).
+# absolute() is enough here — resolve() would stat every path component for symlinks.
+_ENV_FILE = Path(__file__).absolute().parent.parent / ".env"
 
 
 class Settings(BaseSettings):
@@ -20,10 +22,13 @@ class Settings(BaseSettings):
     # LLM
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.0-flash-lite"
+    # Max in-flight Gemini requests per process (excess callers queue instead of hitting 429s)
+    gemini_max_concurrency: int = 8
 
     # Vector DB
     pinecone_api_key: str = ""
     pinecone_index_name: str = "cognify-questions"
+    pinecone_max_concurrency: int = 16
 
     # Supermemory
     supermemory_api_key: str = ""
@@ -31,8 +36,15 @@ class Settings(BaseSettings):
     # Web search
     tavily_api_key: str = ""
 
+    # Auth — bcrypt cost factor (each +1 doubles hashing time; lower only for tests/dev)
+    bcrypt_rounds: int = 12
+
     # App
     app_env: str = "development"
+    # Threads behind asyncio.to_thread (Gemini, Pinecone, ingest, bcrypt). The work
+    # is mostly waiting on the network, so the default is fixed rather than scaled
+    # from the CPU count — a 1-vCPU instance needs the headroom as much as any.
+    worker_threads: int = 32
     # Space- or comma-separated list of allowed origins.
     # In production set: CORS_ORIGINS=https://your-app.vercel.app
     cors_origins: list[str] = ["http://localhost:3000", "http://localhost:3001"]
@@ -47,4 +59,10 @@ class Settings(BaseSettings):
         return v
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build Settings once per process (reads .env + validates on first call only)."""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,117 +1,157 @@
 """
 All database operations for Cognify.
 Uses raw SQL via SQLAlchemy text() — simple and fast for MVP.
+Write helpers never commit; the request-scoped session from get_db() does.
 """
 
+from dataclasses import dataclass
+from functools import lru_cache
+
+import orjson
+from cachetools import TTLCache
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _json(value) -> str:
+    """Encode a JSONB bind parameter (orjson: C encoder, UTF-8 kept as-is)."""
+    return orjson.dumps(value).decode()
 
 
 # ── Users ──────────────────────────────────────────────────────────────────────
 
-def create_user(db: Session, name: str, email: str, password_hash: str) -> dict:
-    row = db.execute(
-        text("""
-            INSERT INTO users (name, email, password_hash)
-            VALUES (:name, :email, :pw)
-            RETURNING id, name, email, created_at
-        """),
+_SQL_CREATE_USER = text("""
+    INSERT INTO users (name, email, password_hash)
+    VALUES (:name, :email, :pw)
+    RETURNING id, name, email, created_at
+""")
+
+
+async def create_user(db: AsyncSession, name: str, email: str, password_hash: str) -> dict:
+    result = await db.execute(
+        _SQL_CREATE_USER,
         {"name": name, "email": email, "pw": password_hash},
-    ).fetchone()
-    db.commit()
+    )
+    row = result.fetchone()
     return dict(row._mapping)
 
 
-def get_user_by_email(db: Session, email: str) -> dict | None:
-    row = db.execute(
-        text("SELECT id, name, email, password_hash FROM users WHERE email = :e"),
-        {"e": email},
-    ).fetchone()
-    return dict(row._mapping) if row else None
+_SQL_GET_USER_BY_EMAIL = text("SELECT id, name, email, password_hash FROM users WHERE email = :e")
 
 
-def get_user_by_id(db: Session, user_id: int) -> dict | None:
-    row = db.execute(
-        text("SELECT id, name, email FROM users WHERE id = :uid"),
-        {"uid": user_id},
-    ).fetchone()
+async def get_user_by_email(db: AsyncSession, email: str) -> dict | None:
+    result = await db.execute(
+        _SQL_GET_USER_BY_EMAIL,
+        {"e": email},
+    )
+    row = result.fetchone()
     return dict(row._mapping) if row else None
 
 
 # ── Concepts ───────────────────────────────────────────────────────────────────
 
-def get_or_create_concept(
-    db: Session, name: str, display_name: str, topic: str, subtopic: str = ""
+# Concept rows are never renamed or deleted at runtime, so name → id is cached
+# per process. Ids are only cached once they come from an existing row — an id
+# inserted by the current (uncommitted) transaction could still be rolled back.
+_concept_ids: dict[str, int] = {}
+
+
+_SQL_GET_OR_CREATE_CONCEPT = text("""
+    WITH ins AS (
+        INSERT INTO concepts (name, display_name, topic, subtopic)
+        VALUES (:n, :dn, :t, :st)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+    )
+    SELECT id, TRUE AS created FROM ins
+    UNION ALL
+    SELECT id, FALSE AS created FROM concepts WHERE name = :n
+    LIMIT 1
+""")
+
+_SQL_GET_CONCEPT_ID = text("SELECT id FROM concepts WHERE name = :n")
+
+
+async def get_or_create_concept(
+    db: AsyncSession, name: str, display_name: str, topic: str, subtopic: str = ""
 ) -> int:
-    """Return concept id, inserting if it doesn't exist."""
-    row = db.execute(
-        text("SELECT id FROM concepts WHERE name = :n"),
-        {"n": name},
-    ).fetchone()
-    if row:
-        return row[0]
-
-    row = db.execute(
-        text("""
-            INSERT INTO concepts (name, display_name, topic, subtopic)
-            VALUES (:n, :dn, :t, :st)
-            RETURNING id
-        """),
+    """Return concept id, inserting if it doesn't exist (single round-trip)."""
+    cached = _concept_ids.get(name)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        _SQL_GET_OR_CREATE_CONCEPT,
         {"n": name, "dn": display_name, "t": topic, "st": subtopic},
-    ).fetchone()
-    db.commit()
-    return row[0]
+    )
+    row = result.fetchone()
+    if row is None:
+        # A concurrent transaction inserted the same name: ON CONFLICT DO NOTHING
+        # waited for it to commit, but this statement's snapshot predates the row.
+        # A fresh statement sees it.
+        result = await db.execute(_SQL_GET_CONCEPT_ID, {"n": name})
+        concept_id = result.scalar_one()
+        _concept_ids[name] = concept_id
+        return concept_id
+    if not row.created:
+        _concept_ids[name] = row.id
+    return row.id
+
 
+_SQL_GET_ALL_CONCEPT_IDS = text("SELECT id, name FROM concepts")
 
-def get_concept_id(db: Session, concept_name: str) -> int | None:
-    row = db.execute(
-        text("SELECT id FROM concepts WHERE name = :n"),
-        {"n": concept_name},
-    ).fetchone()
-    return row[0] if row else None
+
+async def load_concept_ids(db: AsyncSession) -> int:
+    """Fill the name → id cache from every existing concept row (startup prewarm)."""
+    result = await db.execute(_SQL_GET_ALL_CONCEPT_IDS)
+    rows = result.fetchall()
+    _concept_ids.update({r.name: r.id for r in rows})
+    return len(rows)
 
 
 # ── Skill Vector ───────────────────────────────────────────────────────────────
 
-def get_skill(db: Session, user_id: int, concept_id: int) -> float:
-    row = db.execute(
-        text("SELECT skill FROM user_skill WHERE user_id=:u AND concept_id=:c"),
-        {"u": user_id, "c": concept_id},
-    ).fetchone()
-    return float(row[0]) if row else 1000.0
-
-
-def upsert_skill(db: Session, user_id: int, concept_id: int, new_skill: float) -> None:
-    db.execute(
-        text("""
-            INSERT INTO user_skill (user_id, concept_id, skill, updated_at)
-            VALUES (:u, :c, :s, NOW())
-            ON CONFLICT (user_id, concept_id)
-            DO UPDATE SET skill = :s, updated_at = NOW()
-        """),
-        {"u": user_id, "c": concept_id, "s": new_skill},
-    )
-    db.commit()
+_SQL_GET_ALL_SKILLS = text("""
+    SELECT c.name, us.skill
+    FROM user_skill us
+    JOIN concepts c ON c.id = us.concept_id
+    WHERE us.user_id = :u
+""")
 
 
-def get_all_skills(db: Session, user_id: int) -> dict[str, float]:
+async def get_all_skills(db: AsyncSession, user_id: int) -> dict[str, float]:
     """Return {concept_name: skill} for all concepts a user has practiced."""
-    rows = db.execute(
-        text("""
-            SELECT c.name, us.skill
-            FROM user_skill us
-            JOIN concepts c ON c.id = us.concept_id
-            WHERE us.user_id = :u
-        """),
+    result = await db.execute(
+        _SQL_GET_ALL_SKILLS,
         {"u": user_id},
-    ).fetchall()
+    )
+    rows = result.fetchall()
     return {r[0]: float(r[1]) for r in rows}
 
 
 # ── Questions ──────────────────────────────────────────────────────────────────
 
-def insert_question(
-    db: Session,
+_SQL_INSERT_QUESTION = text("""
+    WITH ins AS (
+        INSERT INTO questions
+          (text, question_type, options, correct_option, correct_answer,
+           subtopics, difficulty, source_url, text_hash, embedding_id)
+        VALUES (:t, :qtype, CAST(:opts AS jsonb), :copt, :cans,
+                CAST(:st AS jsonb), :d, :url, :h, :eid)
+        ON CONFLICT (text_hash) DO NOTHING
+        RETURNING id
+    )
+    SELECT id FROM ins
+    UNION ALL
+    SELECT id FROM questions WHERE text_hash = :h
+    LIMIT 1
+""")
+
+_SQL_GET_QUESTION_ID_BY_HASH = text("SELECT id FROM questions WHERE text_hash = :h")
+
+
+async def insert_question(
+    db: AsyncSession,
     text_: str,
     subtopics: list[str],
     difficulty: int,
@@ -124,243 +164,337 @@ def insert_question(
     correct_answer: str | None = None,
 ) -> int:
     """Insert a question; return its Postgres id. Skips if hash exists."""
-    existing = db.execute(
-        text("SELECT id FROM questions WHERE text_hash = :h"),
-        {"h": text_hash},
-    ).fetchone()
-    if existing:
-        return existing[0]
-
-    import json
-    options_str = json.dumps(options) if options else None
-    row = db.execute(
-        text("""
-            INSERT INTO questions
-              (text, question_type, options, correct_option, correct_answer,
-               subtopics, difficulty, source_url, text_hash, embedding_id)
-            VALUES (:t, :qtype, :opts, :copt, :cans,
-                    CAST(:st AS jsonb), :d, :url, :h, :eid)
-            RETURNING id
-        """),
+    options_str = _json(options) if options else None
+    result = await db.execute(
+        _SQL_INSERT_QUESTION,
         {
             "t": text_,
             "qtype": question_type,
             "opts": options_str,
             "copt": correct_option,
             "cans": correct_answer,
-            "st": json.dumps(subtopics),
+            "st": _json(subtopics),
             "d": difficulty,
             "url": source_url,
             "h": text_hash,
             "eid": embedding_id,
         },
-    ).fetchone()
-    db.commit()
+    )
+    row = result.fetchone()
+    if row is None:
+        # Lost a race with a concurrent insert of the same hash (see get_or_create_concept)
+        result = await db.execute(_SQL_GET_QUESTION_ID_BY_HASH, {"h": text_hash})
+        return result.scalar_one()
     return row[0]
 
 
-def get_question_by_id(db: Session, question_id: int) -> dict | None:
-    row = db.execute(
-        text("""
-            SELECT id, text, question_type, options, correct_option, correct_answer,
-                   subtopics, difficulty, source_url
-            FROM questions WHERE id = :qid
-        """),
-        {"qid": question_id},
-    ).fetchone()
-    return dict(row._mapping) if row else None
+_SQL_BULK_INSERT_QUESTIONS = text("""
+    WITH rows AS (
+        SELECT * FROM unnest(
+            CAST(:t AS text[]), CAST(:qtype AS text[]), CAST(:opts AS text[]),
+            CAST(:copt AS text[]), CAST(:cans AS text[]), CAST(:st AS text[]),
+            CAST(:d AS int[]), CAST(:url AS text[]), CAST(:h AS text[]), CAST(:eid AS text[])
+        ) AS r(text, question_type, options, correct_option, correct_answer,
+               subtopics, difficulty, source_url, text_hash, embedding_id)
+    ),
+    ins AS (
+        INSERT INTO questions
+          (text, question_type, options, correct_option, correct_answer,
+           subtopics, difficulty, source_url, text_hash, embedding_id)
+        SELECT text, question_type, CAST(options AS jsonb), correct_option, correct_answer,
+               CAST(subtopics AS jsonb), difficulty, source_url, text_hash, embedding_id
+        FROM rows
+        ON CONFLICT (text_hash) DO NOTHING
+        RETURNING id, text_hash
+    )
+    SELECT id, text_hash FROM ins
+    UNION ALL
+    SELECT id, text_hash FROM questions WHERE text_hash = ANY(CAST(:h AS text[]))
+""")
 
+_SQL_GET_QUESTION_IDS_BY_HASH = text("""
+    SELECT id, text_hash FROM questions WHERE text_hash = ANY(CAST(:h AS text[]))
+""")
 
-def get_questions_by_subtopic(
-    db: Session, subtopic: str, limit: int = 10
-) -> list[dict]:
-    """Fallback: fetch questions from DB when Pinecone returns nothing."""
-    rows = db.execute(
-        text("""
-            SELECT id, text, subtopics, difficulty, source_url
-            FROM questions
-            WHERE subtopics::text ILIKE :s
-            ORDER BY RANDOM()
-            LIMIT :lim
-        """),
-        {"s": f"%{subtopic}%", "lim": limit},
-    ).fetchall()
-    return [dict(r._mapping) for r in rows]
-
-
-def get_adaptive_questions(
-    db: Session,
-    subtopic: str,
-    exclude_ids: list[int],
-    diff_min: int,
-    diff_max: int,
-    limit: int = 10,
-) -> list[dict]:
+
+async def bulk_insert_questions(db: AsyncSession, rows: list[dict]) -> dict[str, int]:
     """
-    Adaptive fetch: filter by difficulty band, exclude already-seen questions,
-    randomise order so the same question never repeats in a row.
-    Falls back to any difficulty if the band returns nothing.
+    Insert many questions in one round-trip; return {text_hash: id} for every row,
+    including ones that already existed. Each row takes the insert_question()
+    keyword names (text_, subtopics, difficulty, source_url, text_hash, ...).
+    Rows are passed as parallel arrays and unnest()ed server-side.
     """
-    import json as _json
-
-    def _fetch(d_min: int, d_max: int) -> list[dict]:
-        exclude_clause = ""
-        params: dict = {"s": f"%{subtopic}%", "d_min": d_min, "d_max": d_max, "lim": limit}
-        if exclude_ids:
-            # Build a safe exclusion list
-            placeholders = ", ".join(f":ex{i}" for i in range(len(exclude_ids)))
-            exclude_clause = f"AND id NOT IN ({placeholders})"
-            for i, eid in enumerate(exclude_ids):
-                params[f"ex{i}"] = eid
-        rows = db.execute(
-            text(f"""
-                SELECT id, text, subtopics, difficulty, source_url,
-                       question_type, options, correct_option, correct_answer
-                FROM questions
-                WHERE subtopics::text ILIKE :s
-                  AND difficulty BETWEEN :d_min AND :d_max
-                  {exclude_clause}
-                ORDER BY RANDOM()
-                LIMIT :lim
-            """),
-            params,
-        ).fetchall()
-        out = []
-        for r in rows:
-            row = dict(r._mapping)
-            # Parse options JSON string if present
-            if row.get("options") and isinstance(row["options"], str):
-                try:
-                    row["options"] = _json.loads(row["options"])
-                except Exception:
-                    row["options"] = None
-            out.append(row)
-        return out
-
-    results = _fetch(diff_min, diff_max)
-    # If the difficulty band is empty or insufficient, top up from any difficulty
-    if len(results) < limit:
-        extra = _fetch(1, 5)
-        seen = {r["id"] for r in results}
-        for r in extra:
-            if r["id"] not in seen:
-                results.append(r)
-                seen.add(r["id"])
-            if len(results) >= limit:
-                break
-    return results[:limit]
-
-
-def count_questions_by_subtopic(db: Session, subtopic: str) -> int:
-    """Count how many questions we have for a subtopic (for low-stock detection)."""
-    row = db.execute(
-        text("SELECT COUNT(*) FROM questions WHERE subtopics::text ILIKE :s"),
-        {"s": f"%{subtopic}%"},
-    ).fetchone()
-    return int(row[0]) if row else 0
-
-
-def get_seen_question_ids(db: Session, user_id: int, subtopic: str) -> list[int]:
-    """Return IDs of questions this user has already attempted for a given subtopic."""
-    rows = db.execute(
-        text("""
-            SELECT DISTINCT a.question_id
+    by_hash: dict[str, dict] = {}
+    for r in rows:
+        by_hash.setdefault(r["text_hash"], r)
+    if not by_hash:
+        return {}
+
+    batch = list(by_hash.values())
+    result = await db.execute(
+        _SQL_BULK_INSERT_QUESTIONS,
+        {
+            "t": [r["text_"] for r in batch],
+            "qtype": [r.get("question_type", "numerical") for r in batch],
+            "opts": [_json(r["options"]) if r.get("options") else None for r in batch],
+            "copt": [r.get("correct_option") for r in batch],
+            "cans": [r.get("correct_answer") for r in batch],
+            "st": [_json(r["subtopics"]) for r in batch],
+            "d": [r["difficulty"] for r in batch],
+            "url": [r["source_url"] for r in batch],
+            "h": [r["text_hash"] for r in batch],
+            "eid": [r.get("embedding_id", "") for r in batch],
+        },
+    )
+    id_by_hash = {r.text_hash: r.id for r in result.fetchall()}
+    missing = [h for h in by_hash if h not in id_by_hash]
+    if missing:
+        # Rows a concurrent transaction committed while ON CONFLICT waited on them
+        # aren't visible to the statement above; a fresh statement sees them.
+        result = await db.execute(_SQL_GET_QUESTION_IDS_BY_HASH, {"h": missing})
+        id_by_hash.update({r.text_hash: r.id for r in result.fetchall()})
+    return id_by_hash
+
+
+_SQL_GET_QUESTION_BY_ID = text("""
+    SELECT id, text, question_type, options, correct_option, correct_answer,
+           subtopics, difficulty, source_url
+    FROM questions WHERE id = :qid
+""")
+
+
+@dataclass(slots=True, frozen=True)
+class QuestionRow:
+    """A stored question with JSON fields decoded and NULL text fields as ""."""
+    id: int
+    text: str
+    question_type: str
+    options: dict | None
+    correct_option: str
+    correct_answer: str
+    subtopics: list[str]
+    difficulty: int
+    source_url: str
+
+
+async def get_question_by_id(db: AsyncSession, question_id: int) -> QuestionRow | None:
+    result = await db.execute(
+        _SQL_GET_QUESTION_BY_ID,
+        {"qid": question_id},
+    )
+    row = result.fetchone()
+    if not row:
+        return None
+
+    # options and subtopics are JSONB — psycopg already decoded them
+    return QuestionRow(
+        id=row.id,
+        text=row.text,
+        question_type=row.question_type or "numerical",
+        options=row.options or None,
+        correct_option=row.correct_option or "",
+        correct_answer=row.correct_answer or "",
+        subtopics=row.subtopics or [],
+        difficulty=row.difficulty,
+        source_url=row.source_url or "",
+    )
+
+
+@lru_cache(maxsize=1024)
+def _subtopic_param(subtopic: str) -> str:
+    """JSONB containment operand for `subtopics @> CAST(:st AS jsonb)` (GIN-indexed)."""
+    return _json([subtopic])
+
+
+# Question stock per subtopic changes only on ingest — a minute of staleness is fine
+_question_counts: TTLCache = TTLCache(maxsize=1, ttl=60)
+
+_SQL_GET_QUESTION_COUNTS_BY_SUBTOPIC = text("""
+    SELECT s.subtopic, COUNT(*) AS n
+    FROM questions, jsonb_array_elements_text(subtopics) AS s(subtopic)
+    GROUP BY s.subtopic
+""")
+
+
+async def get_question_counts_by_subtopic(db: AsyncSession) -> dict[str, int]:
+    """{subtopic: question count} for every subtopic in one scan, cached for 60s."""
+    counts = _question_counts.get("all")
+    if counts is None:
+        result = await db.execute(_SQL_GET_QUESTION_COUNTS_BY_SUBTOPIC)
+        counts = {r.subtopic: int(r.n) for r in result.fetchall()}
+        _question_counts["all"] = counts
+    return counts
+
+
+_SQL_GET_SKILL_AND_SEEN_HASHES = text("""
+    SELECT
+        COALESCE(
+            (SELECT skill FROM user_skill WHERE user_id = :u AND concept_id = :c),
+            1000.0
+        ) AS skill,
+        ARRAY(
+            SELECT DISTINCT q.text_hash
             FROM attempts a
             JOIN questions q ON q.id = a.question_id
             WHERE a.user_id = :u
-              AND q.subtopics::text ILIKE :s
-        """),
-        {"u": user_id, "s": f"%{subtopic}%"},
-    ).fetchall()
-    return [r[0] for r in rows]
+              AND q.subtopics @> CAST(:st AS jsonb)
+            LIMIT :lim
+        ) AS seen_hashes
+""")
+
+
+async def get_skill_and_seen_hashes(
+    db: AsyncSession, user_id: int, concept_id: int, subtopic: str, limit: int
+) -> tuple[float, list[str]]:
+    """
+    get_skill() + up to `limit` text_hashes of questions the user has seen for
+    a subtopic, in one round-trip → (skill, seen_hashes). Hashes match
+    Pinecone's `text_hash` metadata; len == limit means the list may be partial.
+    """
+    result = await db.execute(
+        _SQL_GET_SKILL_AND_SEEN_HASHES,
+        {"u": user_id, "c": concept_id, "st": _subtopic_param(subtopic), "lim": limit},
+    )
+    row = result.fetchone()
+    return float(row.skill), list(row.seen_hashes)
+
+
+_SQL_FILTER_UNSEEN_QUESTION_IDS = text("""
+    SELECT q.id
+    FROM unnest(CAST(:ids AS int[])) AS q(id)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM attempts a WHERE a.user_id = :u AND a.question_id = q.id
+    )
+""")
+
+
+async def filter_unseen_question_ids(db: AsyncSession, user_id: int, ids: list[int]) -> set[int]:
+    """The subset of `ids` this user has never attempted (one index probe per id)."""
+    if not ids:
+        return set()
+    result = await db.execute(_SQL_FILTER_UNSEEN_QUESTION_IDS, {"u": user_id, "ids": ids})
+    return {r[0] for r in result.fetchall()}
 
 
 # ── Attempts ───────────────────────────────────────────────────────────────────
 
-def record_attempt(
-    db: Session,
+_SQL_RECORD_ANSWER = text("""
+    WITH prior AS (
+        -- Consecutive incorrect attempts before this one (the CTE sees the
+        -- pre-insert snapshot); capped at 4 so the total stays capped at 5
+        SELECT COUNT(*) AS streak FROM (
+            SELECT COUNT(*) FILTER (WHERE is_correct) OVER (ORDER BY created_at DESC) AS n_correct
+            FROM attempts
+            WHERE user_id = :u AND question_id = :q
+            ORDER BY created_at DESC
+            LIMIT 4
+        ) recent
+        WHERE n_correct = 0
+    ), ins AS (
+        INSERT INTO attempts
+          (user_id, question_id, is_correct, time_taken, retries, hint_used, cms)
+        VALUES (:u, :q, :ic, :tt, :r, :hu, :cms)
+        RETURNING id
+    ), old AS (
+        SELECT skill FROM user_skill WHERE user_id = :u AND concept_id = :c
+    ), new AS (
+        INSERT INTO user_skill (user_id, concept_id, skill, updated_at)
+        VALUES (:u, :c, elo_update(1000.0, :d, :cms), NOW())
+        ON CONFLICT (user_id, concept_id)
+        DO UPDATE SET skill = elo_update(user_skill.skill, :d, :cms), updated_at = NOW()
+        RETURNING skill
+    )
+    SELECT (SELECT id FROM ins) AS attempt_id,
+           CASE WHEN CAST(:ic AS boolean) THEN 0 ELSE (SELECT streak FROM prior) + 1 END
+               AS incorrect_streak,
+           COALESCE((SELECT skill FROM old), 1000.0) AS old_skill,
+           (SELECT skill FROM new) AS new_skill
+""")
+
+
+async def record_answer(
+    db: AsyncSession,
     user_id: int,
     question_id: int,
+    concept_id: int,
+    difficulty: int,
     is_correct: bool,
     time_taken: float,
     retries: int,
     hint_used: bool,
     cms: float,
 ) -> dict:
-    row = db.execute(
-        text("""
-            INSERT INTO attempts
-              (user_id, question_id, is_correct, time_taken, retries, hint_used, cms)
-            VALUES (:u, :q, :ic, :tt, :r, :hu, :cms)
-            RETURNING id, created_at
-        """),
+    """
+    Insert an attempt and apply its ELO update in one statement (one round-trip).
+    Returns {attempt_id, incorrect_streak, old_skill, new_skill}; the streak
+    includes this attempt, and old_skill is 1000.0 for a first attempt.
+    """
+    result = await db.execute(
+        _SQL_RECORD_ANSWER,
         {
-            "u": user_id, "q": question_id, "ic": is_correct,
-            "tt": time_taken, "r": retries, "hu": hint_used,
+            "u": user_id, "q": question_id, "c": concept_id, "d": difficulty,
+            "ic": is_correct, "tt": time_taken, "r": retries, "hu": hint_used,
             "cms": cms,
         },
-    ).fetchone()
-    db.commit()
-    return dict(row._mapping)
+    )
+    row = result.fetchone()
+    return {
+        "attempt_id": row.attempt_id,
+        "incorrect_streak": int(row.incorrect_streak),
+        "old_skill": float(row.old_skill),
+        "new_skill": float(row.new_skill),
+    }
+
+
+# ── Dashboard ──────────────────────────────────────────────────────────────────
+
+_SQL_GET_DASHBOARD_SNAPSHOT = text("""
+    WITH u AS (
+        SELECT name FROM users WHERE id = :u
+    ),
+    s AS (
+        SELECT COALESCE(json_object_agg(c.name, us.skill), '{}'::json) AS skills
+        FROM user_skill us
+        JOIN concepts c ON c.id = us.concept_id
+        WHERE us.user_id = :u
+    ),
+    recent AS (
+        SELECT a.id, q.text, a.is_correct, a.time_taken, a.cms, a.created_at,
+               COALESCE(q.subtopics->>0, 'general') AS concept
+        FROM attempts a
+        JOIN questions q ON q.id = a.question_id
+        WHERE a.user_id = :u
+        ORDER BY a.created_at DESC
+        LIMIT :n
+    ),
+    r AS (
+        SELECT COALESCE(json_agg(recent ORDER BY recent.created_at DESC), '[]'::json) AS attempts
+        FROM recent
+    )
+    SELECT u.name, s.skills, r.attempts
+    FROM u, s, r
+""")
 
 
-def get_recent_attempts(db: Session, user_id: int, n: int = 10) -> list[dict]:
-    import json as _json
-    rows = db.execute(
-        text("""
-            SELECT a.id, q.text, q.subtopics::text as subtopics_raw,
-                   a.is_correct, a.time_taken, a.cms, a.created_at
-            FROM attempts a
-            JOIN questions q ON q.id = a.question_id
-            WHERE a.user_id = :u
-            ORDER BY a.created_at DESC
-            LIMIT :n
-        """),
-        {"u": user_id, "n": n},
-    ).fetchall()
-    results = []
-    for r in rows:
-        row = dict(r._mapping)
-        try:
-            subtopics = _json.loads(row.pop("subtopics_raw", "[]"))
-            row["concept"] = subtopics[0] if subtopics else "general"
-        except Exception:
-            row["concept"] = "general"
-        results.append(row)
-    return results
-
-
-def get_incorrect_streak(db: Session, user_id: int, question_id: int) -> int:
-    """Count consecutive incorrect attempts for a specific question."""
-    rows = db.execute(
-        text("""
-            SELECT is_correct FROM attempts
-            WHERE user_id = :u AND question_id = :q
-            ORDER BY created_at DESC
-            LIMIT 5
-        """),
-        {"u": user_id, "q": question_id},
-    ).fetchall()
-    streak = 0
-    for r in rows:
-        if not r[0]:
-            streak += 1
-        else:
-            break
-    return streak
-
-
-def get_avg_cms(db: Session, user_id: int, n: int = 10) -> float:
-    row = db.execute(
-        text("""
-            SELECT AVG(cms) FROM (
-                SELECT cms FROM attempts
-                WHERE user_id = :u AND cms IS NOT NULL
-                ORDER BY created_at DESC
-                LIMIT :n
-            ) sub
-        """),
+async def get_dashboard_snapshot(db: AsyncSession, user_id: int, n: int = 10) -> dict | None:
+    """
+    Everything the dashboard needs in one round-trip:
+      name, {concept_name: skill}, last n attempts, avg CMS of those attempts.
+    Returns None if the user doesn't exist.
+    """
+    result = await db.execute(
+        _SQL_GET_DASHBOARD_SNAPSHOT,
         {"u": user_id, "n": n},
-    ).fetchone()
-    val = row[0] if row and row[0] is not None else 0.5
-    return round(float(val), 4)
+    )
+    row = result.fetchone()
+    if not row:
+        return None
+    # Readiness = avg CMS over the same n attempts — no second sort of attempts
+    cms_values = [a["cms"] for a in row.attempts if a["cms"] is not None]
+    avg_cms = sum(cms_values) / len(cms_values) if cms_values else 0.5
+    return {
+        "name": row.name,
+        "skills": {k: float(v) for k, v in row.skills.items()},
+        "recent_attempts": row.attempts,
+        "avg_cms": round(float(avg_cms), 4),
+    }
@@ -1,13 +1,14 @@
 """
 Database connection and session utilities.
-Uses SQLAlchemy 2.0 (sync) with psycopg3 driver.
-Dialect: postgresql+psycopg://
+Uses SQLAlchemy 2.0 (asyncio) with psycopg3 driver.
+Dialect: postgresql+psycopg:// — create_async_engine picks psycopg's async mode.
 """
 
 from pathlib import Path
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
 
@@ -18,8 +19,12 @@ _is_local = any(
     for token in ("localhost", "127.0.0.1", "::1")
 )
 _connect_args = {} if _is_local else {"sslmode": "require"}
+# Server-side prepare every statement from its second execution on, so the hot
+# per-request queries (record_answer, get_question_by_id) skip parse+plan.
+# Our crud SQL is built once at import, so the set of prepared names stays small.
+_connect_args["prepare_threshold"] = 1
 
-engine = create_engine(
+engine = create_async_engine(
     settings.database_url,
     pool_pre_ping=True,  # auto-reconnect on stale connections
     pool_size=5,
@@ -27,31 +32,37 @@ engine = create_engine(
     connect_args=_connect_args,
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    """FastAPI dependency — yields a DB session, closes on exit."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_db():
+    """
+    FastAPI dependency — yields a DB session for the whole request.
+    Commits once on success (one WAL flush per request), rolls back on error.
+    Routes that go on to slow external calls commit first themselves, so the
+    transaction (and its row/index locks) never spans an LLM or web round-trip.
+    """
+    async with SessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
 
 
-def run_migrations():
+async def run_migrations():
     """Run the initial SQL migration on startup if tables don't exist."""
     sql_path = Path(__file__).parent.parent / "migrations" / "001_init.sql"
     if not sql_path.exists():
         print("[DB] Migration file not found, skipping.")
         return
 
-    with engine.connect() as conn:
+    async with engine.begin() as conn:
         sql = sql_path.read_text()
-        conn.execute(text(sql))
-        conn.commit()
+        await conn.execute(text(sql))
     print("[DB] Migrations applied.")
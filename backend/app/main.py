@@ -1,26 +1,81 @@
+import asyncio
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
-from app.db import run_migrations
+from app import crud
+from app.db import SessionLocal, run_migrations
 from app.routers import auth, dashboard, doubt, practice
+from app.services import gemini_client, pinecone_client, supermemory
+from app.services.concept_graph import get_all_concepts
 from app.services.scheduler import start_scheduler, stop_scheduler
 
 
+def _start_log_listener() -> QueueListener:
+    """
+    Route app logging through a queue: request code only enqueues records and a
+    listener thread does the (blocking) stream writes off the event loop.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    listener = QueueListener(log_queue, stream, respect_handler_level=True)
+
+    logging.getLogger().addHandler(QueueHandler(log_queue))
+    # INFO for our own loggers only; the root stays at WARNING so httpx, pinecone
+    # and google don't log a line per outbound request.
+    logging.getLogger("app").setLevel(logging.INFO)
+    listener.start()
+    return listener
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("[Cognify] Starting up...")
+    log_listener = _start_log_listener()
+    # asyncio.to_thread() runs on the loop's default executor; the stock size
+    # (cpu + 4) is only 5 threads on a 1-vCPU instance, which one ingest plus a
+    # few Gemini calls already fill.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.worker_threads, thread_name_prefix="cognify")
+    )
+    # Starlette runs sync routes/dependencies through AnyIO's own pool (40 tokens
+    # by default); let WORKER_THREADS raise that limit, never lower it.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, settings.worker_threads)
     try:
-        run_migrations()
+        await run_migrations()
     except Exception as e:
         print(f"[DB] Migration warning: {e}")
+    # First /start and /answer per concept skip the get-or-create round-trip
+    try:
+        async with SessionLocal() as db:
+            n = await crud.load_concept_ids(db)
+        print(f"[DB] Cached {n} concept ids.")
+    except Exception as e:
+        print(f"[DB] Concept id prewarm skipped: {e}")
+    await asyncio.to_thread(pinecone_client.warm_up)
+    # Topic embeddings warm in the background — requests that arrive first just
+    # fetch their own (single-flight) embedding as before.
+    embed_warmup = asyncio.create_task(gemini_client.warm_topic_embeddings(get_all_concepts()))
+    supermemory.start_summary_writer()
     start_scheduler()
     yield
     # Shutdown
+    embed_warmup.cancel()
     stop_scheduler()
+    await asyncio.to_thread(supermemory.stop_summary_writer)
+    await supermemory.aclose()
+    log_listener.stop()  # flushes queued records
     print("[Cognify] Shutting down.")
 
 
@@ -29,6 +84,9 @@ app = FastAPI(
     version="0.1.0",
     description="Adaptive cognitive learning system for JEE Mathematics",
     lifespan=lifespan,
+    # orjson writes UTF-8 directly (∫, ² stay 2–3 bytes, not \uXXXX escapes) and is
+    # much faster than stdlib json on the question-heavy /practice payloads
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -4,19 +4,24 @@ Passwords hashed with bcrypt directly.
 Returns user_id on success — swap for JWT in production.
 """
 
+import asyncio
+
 import bcrypt
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
+from app.config import settings
 from app.db import get_db
 
 router = APIRouter()
 
+_SALT_ROUNDS = settings.bcrypt_rounds
+
 
 def _hash_password(plain: str) -> str:
-    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt(rounds=_SALT_ROUNDS)).decode()
 
 
 def _verify_password(plain: str, hashed: str) -> bool:
@@ -38,13 +43,14 @@ class LoginRequest(BaseModel):
 # ── Routes ─────────────────────────────────────────────────────────────────────
 
 @router.post("/register", status_code=201)
-def register(body: RegisterRequest, db: Session = Depends(get_db)):
+async def register(body: RegisterRequest, db: AsyncSession = Depends(get_db)):
     """Create a new user account."""
-    if crud.get_user_by_email(db, body.email):
+    if await crud.get_user_by_email(db, body.email):
         raise HTTPException(status_code=409, detail="Email already registered")
 
-    hashed = _hash_password(body.password)
-    user = crud.create_user(db, body.name, body.email, hashed)
+    # bcrypt is deliberately slow — keep it off the event loop
+    hashed = await asyncio.to_thread(_hash_password, body.password)
+    user = await crud.create_user(db, body.name, body.email, hashed)
     return {
         "user_id": user["id"],
         "name": user["name"],
@@ -54,10 +60,10 @@ def register(body: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-def login(body: LoginRequest, db: Session = Depends(get_db)):
+async def login(body: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Authenticate user and return user_id."""
-    user = crud.get_user_by_email(db, body.email)
-    if not user or not _verify_password(body.password, user["password_hash"]):
+    user = await crud.get_user_by_email(db, body.email)
+    if not user or not await asyncio.to_thread(_verify_password, body.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     return {
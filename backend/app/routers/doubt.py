@@ -4,13 +4,96 @@ Doubt router — step-by-step solution with sympy verification.
   POST /doubt/solve  → same (alias for frontend)
 """
 
+import asyncio
+import io
+import tokenize
+from functools import lru_cache, partial
+
+import sympy
 from fastapi import APIRouter
 from pydantic import BaseModel
+from sympy.parsing.sympy_parser import (
+    convert_xor,
+    implicit_multiplication,
+    parse_expr,
+    standard_transformations,
+)
 
+from app.services import llm_cache
 from app.services.gemini_client import solve_doubt, solve_doubt_with_image
 
 router = APIRouter()
 
+# Built once — parse_expr skips sympify's type dispatch and accepts "2x" style
+# input; convert_xor keeps sympify's reading of "x^2" as a power
+_TRANSFORMATIONS = standard_transformations + (convert_xor, implicit_multiplication)
+
+# sympy_expr is LLM output, and parse_expr eval()s it. Evaluate against an
+# allow-list instead of `from sympy import *` + builtins: the constructors the
+# transformations emit, plus the maths a final answer plausibly uses. Bare
+# unknown names still become Symbols via auto_symbol, but calling one is an
+# error (see _unknown_call) — implicit multiplication would otherwise read
+# N(pi) as N*pi and "verify" the wrong value.
+_SYMPY_NAMES = (
+    # emitted by the transformations
+    "Symbol", "Function", "Integer", "Float", "Rational", "Lambda", "factorial", "factorial2",
+    # constants
+    "pi", "E", "I", "oo", "zoo", "nan",
+    # elementary functions
+    "sqrt", "cbrt", "root", "exp", "log", "ln", "Abs", "sign", "floor", "ceiling", "Max", "Min",
+    "sin", "cos", "tan", "cot", "sec", "csc", "asin", "acos", "atan", "atan2", "acot", "asec", "acsc",
+    "sinh", "cosh", "tanh", "asinh", "acosh", "atanh",
+    "re", "im", "arg", "conjugate", "binomial", "gamma",
+    # calculus, algebra, matrices
+    "diff", "integrate", "limit", "Derivative", "Integral", "Limit", "Sum", "Product",
+    "simplify", "expand", "factor", "Eq", "Matrix", "det", "N", "nsimplify",
+)
+_SYMPY_GLOBALS = {"__builtins__": {}, **{name: getattr(sympy, name) for name in _SYMPY_NAMES}}
+
+
+def _unknown_call(expr: str) -> str | None:
+    """First name called as a function that isn't in the allow-list (methods excluded)."""
+    tokens = list(tokenize.generate_tokens(io.StringIO(expr).readline))
+    for prev, tok, nxt in zip([None, *tokens], tokens, tokens[1:]):
+        if (
+            tok.type == tokenize.NAME
+            and nxt.string == "("
+            and (prev is None or prev.string != ".")
+            and tok.string not in _SYMPY_GLOBALS
+        ):
+            return tok.string
+    return None
+
+
+@lru_cache(maxsize=2048)
+def _verify_sympy(expr: str) -> tuple[str | None, str | None]:
+    """
+    Parse + evaluate expr once per distinct string → (verified, error).
+
+    >>> _verify_sympy("x^2 + 1")
+    ('x**2 + 1', None)
+    >>> _verify_sympy("sqrt(2)")
+    ('sqrt(2)', None)
+    >>> _verify_sympy("N(pi)")
+    ('3.14159265358979', None)
+    >>> _verify_sympy("foo(pi)")
+    (None, "Unknown function 'foo'")
+    >>> _verify_sympy("().__class__")
+    (None, 'Expression uses a disallowed name')
+    """
+    if "__" in expr:  # no dunder attribute walks out of the allow-list
+        return None, "Expression uses a disallowed name"
+    try:
+        unknown = _unknown_call(expr)
+        if unknown is not None:
+            return None, f"Unknown function '{unknown}'"
+        parsed = parse_expr(
+            expr, global_dict=_SYMPY_GLOBALS, transformations=_TRANSFORMATIONS, evaluate=True
+        )
+        return str(parsed), None
+    except Exception as e:
+        return None, str(e)
+
 
 # ── Schemas ──────────────────────────────────────────────────────────────────────────────
 
@@ -26,22 +109,28 @@ class DoubtRequest(BaseModel):
 
 @router.post("")
 @router.post("/solve")
-def resolve_doubt(body: DoubtRequest):
+async def resolve_doubt(body: DoubtRequest):
     """
     Full flow:
     1. If image provided → Gemini Vision solves from image
     2. Else Gemini text solve
     3. sympy: verify the final_answer expression
     4. Return steps + verified answer
+
+    Solutions are cached on an exact key of (question or image, attempt), so a
+    repeated doubt skips the Gemini call entirely.
     """
     if body.image_base64:
-        solution = solve_doubt_with_image(
+        key = llm_cache.doubt_image_key(body.image_base64, body.student_attempt)
+        solve = partial(
+            solve_doubt_with_image,
             body.image_base64,
             body.image_mime_type,
             body.student_attempt,
         )
     elif body.question_text.strip():
-        solution = solve_doubt(body.question_text, body.student_attempt)
+        key = llm_cache.doubt_key(body.question_text, body.student_attempt)
+        solve = partial(solve_doubt, body.question_text, body.student_attempt)
     else:
         return {
             "question": "",
@@ -51,18 +140,20 @@ def resolve_doubt(body: DoubtRequest):
             "sympy_error": None,
         }
 
-    # sympy verification
+    solution = llm_cache.doubt_solutions.get(key)
+    if solution is None:
+        solution = await asyncio.to_thread(solve)
+        # Error fallbacks come back with an empty final_answer — don't pin those
+        if solution.get("final_answer"):
+            llm_cache.doubt_solutions[key] = solution
+
+    # sympy verification (LLMs often emit the same normalised expression)
     verified = None
     sympy_error = None
     sympy_expr = solution.get("sympy_expr", "")
 
     if sympy_expr:
-        try:
-            import sympy
-            result = sympy.sympify(sympy_expr)
-            verified = str(result)
-        except Exception as e:
-            sympy_error = str(e)
+        verified, sympy_error = await asyncio.to_thread(_verify_sympy, sympy_expr)
 
     return {
         "question": body.question_text,
@@ -1,29 +1,29 @@
 """
 Practice router — core session management.
-  POST /practice/start   → select topic, retrieve learner state, serve questions
+  POST /practice/start   → select topic, serve questions in the learner's difficulty band
   POST /practice/answer  → record attempt, compute CMS, update skill, maybe remediate
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+import orjson
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-import hashlib
-import json
-from concurrent.futures import ThreadPoolExecutor, Future
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import bisect
+import logging
 
 from app import crud
 from app.db import get_db
 from app.services.cms import compute_cms
-from app.services.concept_graph import get_all_concepts, load_graph
-from app.services.elo import get_or_init_skill, persist_skill, update_skill
-from app.services.gemini_client import get_embedding, generate_hint, generate_questions_for_topic
-from app.services.ingestion import ingest_topic
+from app.services.concept_graph import ALL_CONCEPTS, get_all_concepts, get_concept_meta
+from app.services import llm_cache
+from app.services.gemini_client import HINT_FALLBACK, generate_hint, generate_questions_for_topic, get_topic_embedding
+from app.services.ingestion import ingest_topic_once, is_valid_question, start_ingest, text_fingerprint
 from app.services.pinecone_client import query_questions
 from app.services.remediation import should_remediate, trigger_remediation
-from app.services.supermemory import get_learner_state, write_session_summary, format_learner_context
+from app.services.supermemory import get_learner_state, enqueue_session_summary, format_learner_context
 
-# Shared thread pool for parallel IO-bound tasks in answer submission
-_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -49,11 +49,17 @@ _ELO_BANDS: list[tuple[float, int, int]] = [
     (9999, 5, 5),   # mastery
 ]
 
+_ELO_UPPERS: list[float] = [upper for upper, _, _ in _ELO_BANDS]
+_ELO_RANGES: list[tuple[int, int]] = [(d_min, d_max) for _, d_min, d_max in _ELO_BANDS] + [(5, 5)]
+
+
 def _elo_to_difficulty(elo: float) -> tuple[int, int]:
-    for upper, d_min, d_max in _ELO_BANDS:
-        if elo < upper:
-            return d_min, d_max
-    return 5, 5
+    # bisect_right: an ELO equal to a bound belongs to the next band (elo < upper)
+    return _ELO_RANGES[bisect.bisect_right(_ELO_UPPERS, elo)]
+
+
+# Max seen-question hashes pushed into the Pinecone `$nin` filter
+_PINECONE_EXCLUDE_MAX = 200
 
 
 # Low-stock threshold — trigger background ingest when unseen count drops below this
@@ -71,271 +77,268 @@ class AnswerRequest(BaseModel):
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-_QUESTION_STARTERS = (
-    "find", "evaluate", "calculate", "compute", "prove", "show", "determine",
-    "if ", "let ", "for ", "given", "solve", "integrate", "differentiate",
-    "a ", "an ", "the ", "two ", "three ", "four ", "five ",
-    "which", "what", "how", "when", "using", "without", "insert", "in a ",
-    "from ", "p(", "suppose", "consider",
-)
-
-# Phrases that ONLY appear in scraped article/document text, never in real questions
-_JUNK_PHRASES = (
-    "the document contains",
-    "this document contains",
-    "pdf includes",
-    "pdf contains",
-    "detailing various",
-    "includes different types of questions",
-    "jee main and advanced exams, detailing",
-    "collection of questions",
-    "set of questions",
-)
-
-def _is_valid_question(text: str) -> bool:
-    """Return True if text looks like a real JEE math question (not scraped article text)."""
-    t = text.strip()
-    if not t or len(t) < 15:
-        return False
-    t_lower = t.lower()
-    # Reject known article/document description patterns (very specific phrases only)
-    if any(p in t_lower for p in _JUNK_PHRASES):
-        return False
-    # Reject obviously long article text (real questions are usually < 450 chars)
-    if len(t) > 450:
-        return False
-    # Accept if it ends with "?"
-    if t.endswith("?"):
-        return True
-    # Accept if it starts with a known question word/pattern
-    if any(t_lower.startswith(s) for s in _QUESTION_STARTERS):
-        return True
-    # Accept if it contains LaTeX math markers or math symbols
-    if any(marker in t for marker in ["∫", "∑", "∏", "√", "²", "³", "^", "dx", "dy", "$", "\\lim", "\\int", "\\frac", "P("]):
-        return True
-    return False
-
-
-def _ensure_concept(db: Session, concept_name: str) -> int:
+async def _ensure_concept(db: AsyncSession, concept_name: str) -> int:
     """Get or create the concept in DB, using graph metadata for display info."""
-    graph = load_graph()
-    node = graph.get(concept_name, {})
-    return crud.get_or_create_concept(
+    meta = get_concept_meta(concept_name)
+    return await crud.get_or_create_concept(
         db,
         name=concept_name,
-        display_name=node.get("display_name", concept_name.replace("_", " ").title()),
-        topic=node.get("topic", "General"),
-        subtopic=node.get("subtopic", ""),
+        display_name=meta["display_name"],
+        topic=meta["topic"],
+        subtopic=meta["subtopic"],
     )
 
 
 # ── Routes ─────────────────────────────────────────────────────────────────────
 
 @router.post("/start")
-def start_session(body: PracticeStartRequest, db: Session = Depends(get_db)):
-    """
-    Pinecone-first flow — no hardcoded/seeded questions:
-      1. Query Pinecone for existing questions on this topic
-      2. If insufficient → run Tavily ingest SYNCHRONOUSLY → re-query Pinecone
-      3. Cache Pinecone results in DB (dedup by hash)
-      4. Gemini generation as last resort if Tavily also fails
-    """
+async def start_session(body: PracticeStartRequest, db: AsyncSession = Depends(get_db)):
     # NOTE: No pre-seeded questions — all questions come from Pinecone/Tavily/Gemini
-    all_concepts = get_all_concepts()
-    if body.topic not in all_concepts:
+    if body.topic not in ALL_CONCEPTS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unknown topic '{body.topic}'. Valid topics: {all_concepts[:10]}..."
+            detail=f"Unknown topic '{body.topic}'. Valid topics: {list(get_all_concepts()[:10])}..."
         )
+    return await _run_start(db, body.user_id, body.topic, body.n)
 
-    # 1. Learner state (background — only needed for Gemini fallback)
-    learner_state_future: Future = _EXECUTOR.submit(get_learner_state, body.user_id)
-
-    # 2. Skill + difficulty band
-    concept_id = _ensure_concept(db, body.topic)
-    skill = get_or_init_skill(db, body.user_id, concept_id)
-    diff_min, diff_max = _elo_to_difficulty(skill)
 
-    # 3. Seen question IDs — exclude from this session
-    seen_ids: set[int] = set(crud.get_seen_question_ids(db, body.user_id, body.topic))
+async def _run_start(db: AsyncSession, user_id: int, topic: str, n: int) -> dict:
+    """
+    Pinecone-first flow — no hardcoded/seeded questions:
+      1. Query Pinecone for existing questions on this topic
+      2. If insufficient → Tavily ingest: in the background when some questions
+         were found (partial batch served now), else SYNCHRONOUSLY → re-query Pinecone
+      3. Cache Pinecone results in DB (dedup by hash)
+      4. Gemini generation as last resort if Tavily also fails
 
-    # 4. Get topic embedding for Pinecone query
-    try:
-        query_emb = get_embedding(body.topic.replace("_", " "))
-    except Exception as e:
-        print(f"[Practice] Embedding error: {e}")
-        query_emb = None
+    Shared by /start and /adaptive-start; `topic` must already be a known concept.
+    """
+    async def _topic_embedding() -> list[float] | None:
+        try:
+            return await get_topic_embedding(topic)
+        except Exception as e:
+            logger.warning(f"[Practice] Embedding error: {e}")
+            return None
 
-    def _pinecone_query(n: int) -> list[dict]:
+    async def _pinecone_query(k: int, band: tuple[int, int] | None = None) -> list[dict]:
+        query_emb = await embedding_task  # already-finished task → returns immediately
         if not query_emb:
             return []
         try:
-            return query_questions(subtopic=body.topic, query_embedding=query_emb, n=n * 2) or []
+            return await asyncio.to_thread(
+                query_questions, subtopic=topic, query_embedding=query_emb, n=k * 2,
+                difficulty_range=band, exclude_hashes=exclude_hashes,
+            ) or []
         except Exception as e:
-            print(f"[Practice] Pinecone query error: {e}")
+            logger.warning(f"[Practice] Pinecone query error: {e}")
             return []
 
-    def _cache_and_format(hits: list[dict], existing_ids: set[int]) -> tuple[list[dict], set[int]]:
-        """Insert Pinecone hits into DB as cache, return valid unseen questions."""
-        qs: list[dict] = []
-        ids = set(existing_ids)
+    # 1. Kick off the topic embedding (usually already cached) so it overlaps
+    #    with the DB query below.
+    embedding_task = asyncio.create_task(_topic_embedding())
+
+    # 2. Skill (→ difficulty band) + seen questions to exclude, in one query.
+    #    While the seen list is small it is excluded inside Pinecone, so every hit
+    #    is unseen; past that the filter payload outgrows its benefit and the DB
+    #    does the set difference on the (few) hit ids instead.
+    concept_id = await _ensure_concept(db, topic)
+    skill, seen_hashes = await crud.get_skill_and_seen_hashes(
+        db, user_id, concept_id, topic, limit=_PINECONE_EXCLUDE_MAX + 1
+    )
+    diff_min, diff_max = _elo_to_difficulty(skill)
+    exclude_hashes = seen_hashes if len(seen_hashes) <= _PINECONE_EXCLUDE_MAX else None
+
+    async def _cache_and_format(
+        hits: list[dict], existing_ids: set[int], limit: int
+    ) -> tuple[list[dict], set[int]]:
+        """
+        Insert Pinecone hits into DB as cache (one bulk insert), return up to
+        `limit` valid unseen questions. Every valid hit is cached, not just those returned.
+        """
+        candidates: list[dict] = []
         for ph in hits:
             text = ph.get("text", "").strip()
-            if not text or not _is_valid_question(text):
+            if not text or not is_valid_question(text):
                 continue
             # Parse options from JSON string (Pinecone stores flat metadata)
             raw_opts = ph.get("options", "")
             options = None
             if raw_opts:
                 try:
-                    options = json.loads(raw_opts)
+                    options = orjson.loads(raw_opts)
                 except Exception:
                     options = None
-            qtype = ph.get("question_type", "numerical")
-            correct_option = ph.get("correct_option") or None
-            correct_answer = ph.get("correct_answer") or None
-            try:
-                db_id = crud.insert_question(
-                    db,
-                    text_=text,
-                    subtopics=ph.get("subtopics", [body.topic]),
-                    difficulty=int(ph.get("difficulty", 3)),
-                    source_url=ph.get("source_url", ""),
-                    text_hash=ph.get("text_hash", hashlib.sha256(text.encode()).hexdigest()),
-                    embedding_id=ph.get("question_id", ""),
-                    question_type=qtype,
-                    options=options,
-                    correct_option=correct_option,
-                    correct_answer=correct_answer,
-                )
-            except Exception:
-                continue
-            if db_id in seen_ids or db_id in ids:
+            qtype = str(ph.get("question_type", "numerical")).lower()
+            candidates.append({
+                "text_": text,
+                "subtopics": ph.get("subtopics", [topic]),
+                "difficulty": max(1, min(5, int(ph.get("difficulty", 3)))),
+                "source_url": ph.get("source_url", ""),
+                "text_hash": ph.get("text_hash") or text_fingerprint(text),
+                "embedding_id": ph.get("question_id", ""),
+                "question_type": qtype if qtype in ("mcq", "numerical") else "numerical",
+                "options": options,
+                "correct_option": ph.get("correct_option") or None,
+                "correct_answer": ph.get("correct_answer") or None,
+            })
+
+        ids = set(existing_ids)
+        if not candidates:
+            return [], ids
+        try:
+            # Savepoint: a bad batch must not abort the request transaction
+            async with db.begin_nested():
+                id_by_hash = await crud.bulk_insert_questions(db, candidates)
+        except Exception as e:
+            logger.exception(f"[Practice] Question cache insert error: {e}")
+            return [], ids
+        unseen = None
+        if exclude_hashes is None:
+            unseen = await crud.filter_unseen_question_ids(db, user_id, list(id_by_hash.values()))
+
+        qs: list[dict] = []
+        for c in candidates:
+            if len(qs) >= limit:
+                break
+            db_id = id_by_hash.get(c["text_hash"])
+            if db_id is None or db_id in ids or (unseen is not None and db_id not in unseen):
                 continue
             qs.append({
                 "id": db_id,
-                "text": text,
-                "question_type": qtype,
-                "options": options,
-                "correct_option": correct_option,
-                "correct_answer": correct_answer,
-                "subtopics": ph.get("subtopics", [body.topic]),
-                "difficulty": int(ph.get("difficulty", 3)),
+                "text": c["text_"],
+                "question_type": c["question_type"],
+                "options": c["options"],
+                "correct_option": c["correct_option"],
+                "correct_answer": c["correct_answer"],
+                "subtopics": c["subtopics"],
+                "difficulty": c["difficulty"],
             })
             ids.add(db_id)
         return qs, ids
 
-    # 5. Query Pinecone
-    pinecone_hits = _pinecone_query(body.n)
-    questions, result_ids = _cache_and_format(pinecone_hits, seen_ids)
-
-    # 6. If Pinecone insufficient → Tavily ingest → re-query Pinecone
-    if len(questions) < body.n:
-        print(f"[Practice] Pinecone returned {len(questions)}/{body.n} — running Tavily ingest for '{body.topic}'...")
+    # 3. Pinecone: unseen questions in the learner's difficulty band; if the band
+    #    is thin, top up from any difficulty before paying for a web ingest
+    pinecone_hits = await _pinecone_query(n, (diff_min, diff_max))
+    questions, result_ids = await _cache_and_format(pinecone_hits, set(), n)
+    if len(questions) < n:
+        extra_qs, result_ids = await _cache_and_format(
+            await _pinecone_query(n), result_ids, n - len(questions)
+        )
+        questions.extend(extra_qs)
+
+    # 4. If Pinecone insufficient → Tavily ingest → re-query Pinecone.
+    #    With something to serve already, return it now and ingest in the
+    #    background: the client asks for the next batch when this one runs out,
+    #    and that /start finds the new questions. Only an empty result waits.
+    partial = 0 < len(questions) < n
+    if partial:
+        logger.info(f"[Practice] Pinecone returned {len(questions)}/{n} — serving partial batch, ingesting '{topic}' in background")
+        start_ingest(topic, n=20)
+    elif len(questions) < n:
+        logger.info(f"[Practice] Pinecone returned {len(questions)}/{n} — running Tavily ingest for '{topic}'...")
+        # End the transaction before the slow external calls: uncommitted concept /
+        # question rows would hold their unique-index entries for the whole ingest,
+        # blocking concurrent /start calls' ON CONFLICT on the same keys.
+        await db.commit()
         try:
-            ingest_topic(body.topic, n=20)
+            await ingest_topic_once(topic, n=20)
         except Exception as e:
-            print(f"[Practice] Tavily ingest error (non-fatal): {e}")
+            logger.warning(f"[Practice] Tavily ingest error (non-fatal): {e}")
         # Re-query Pinecone after ingest
-        new_hits = _pinecone_query(body.n)
-        extra_qs, result_ids = _cache_and_format(new_hits, result_ids)
-        # Add only new questions
-        existing_ids = {q["id"] for q in questions}
-        for q in extra_qs:
-            if q["id"] not in existing_ids and len(questions) < body.n:
-                questions.append(q)
-
-    # 7. Gemini generation — Pinecone + Tavily both insufficient
-    learner_state: dict = {}
-    if len(questions) < body.n:
+        new_hits = await _pinecone_query(n)
+        # result_ids already holds everything in `questions`, so extras are all new
+        extra_qs, result_ids = await _cache_and_format(new_hits, result_ids, n - len(questions))
+        questions.extend(extra_qs)
+
+    # 5. Gemini generation — Pinecone + Tavily both insufficient
+    if not partial and len(questions) < n:
+        await db.commit()  # as above — nothing held open across the Gemini call
+        # Learner state only personalises this fallback — fetched only when it runs
         try:
-            learner_state = learner_state_future.result(timeout=4)
+            learner_state = await asyncio.wait_for(get_learner_state(user_id), timeout=4)
         except Exception:
-            pass
+            learner_state = {}
         learner_ctx = format_learner_context(learner_state)
-        needed = body.n - len(questions)
-        print(f"[Practice] Gemini generating {needed} questions for '{body.topic}'...")
-        generated = generate_questions_for_topic(body.topic, n=needed, learner_context=learner_ctx)
+        needed = n - len(questions)
+        logger.info(f"[Practice] Gemini generating {needed} questions for '{topic}'...")
+        generated = await asyncio.to_thread(
+            generate_questions_for_topic, topic, n=needed, learner_context=learner_ctx
+        )
+        candidates: list[dict] = []
         for gq in generated:
             text = gq.get("text", "").strip()
-            if not text or not _is_valid_question(text):
+            if not text or not is_valid_question(text):
                 continue
-            diff = max(1, min(5, int(gq.get("difficulty", 3))))
-            qtype = gq.get("question_type", "numerical")
-            options = gq.get("options")
-            correct_option = gq.get("correct_option")
-            correct_answer = gq.get("correct_answer")
-            h = hashlib.sha256(text.strip().lower().encode()).hexdigest()
+            qtype = str(gq.get("question_type", "numerical")).lower()
+            candidates.append({
+                "text_": text,
+                "subtopics": [topic],
+                "difficulty": max(1, min(5, int(gq.get("difficulty", 3)))),
+                "source_url": "gemini_generated",
+                "text_hash": text_fingerprint(text.lower()),
+                "embedding_id": "",
+                # Normalised so the questions.question_type CHECK can't sink the batch
+                "question_type": qtype if qtype in ("mcq", "numerical") else "numerical",
+                "options": gq.get("options"),
+                "correct_option": gq.get("correct_option"),
+                "correct_answer": gq.get("correct_answer"),
+            })
+        id_by_hash: dict[str, int] = {}
+        if candidates:
             try:
-                db_id = crud.insert_question(
-                    db, text_=text, subtopics=[body.topic], difficulty=diff,
-                    source_url="gemini_generated", text_hash=h, embedding_id="",
-                    question_type=qtype, options=options,
-                    correct_option=correct_option, correct_answer=correct_answer,
-                )
-            except Exception:
+                async with db.begin_nested():
+                    id_by_hash = await crud.bulk_insert_questions(db, candidates)
+            except Exception as e:
+                logger.exception(f"[Practice] Generated question insert error: {e}")
+        for c in candidates:
+            if len(questions) >= n:
+                break
+            db_id = id_by_hash.get(c["text_hash"])
+            if db_id is None or db_id in result_ids:
                 continue
-            if db_id not in result_ids:
-                questions.append({
-                    "id": db_id, "text": text,
-                    "question_type": qtype, "options": options,
-                    "correct_option": correct_option, "correct_answer": correct_answer,
-                    "subtopics": [body.topic], "difficulty": diff,
-                })
-                result_ids.add(db_id)
-    else:
-        try:
-            learner_state = learner_state_future.result(timeout=4)
-        except Exception:
-            pass
+            questions.append({
+                "id": db_id, "text": c["text_"],
+                "question_type": c["question_type"], "options": c["options"],
+                "correct_option": c["correct_option"], "correct_answer": c["correct_answer"],
+                "subtopics": c["subtopics"], "difficulty": c["difficulty"],
+            })
+            result_ids.add(db_id)
 
     if not questions:
         raise HTTPException(
             status_code=404,
-            detail=f"No questions found for topic '{body.topic}'. Try another topic."
+            detail=f"No questions found for topic '{topic}'. Try another topic."
         )
 
     return {
-        "user_id": body.user_id,
-        "topic": body.topic,
+        "user_id": user_id,
+        "topic": topic,
         "skill": skill,
         "difficulty_band": [diff_min, diff_max],
-        "learner_state": learner_state,
-        "questions": questions[:body.n],
-        "questions_count": min(len(questions), body.n),
+        "questions": questions,
+        "questions_count": len(questions),
+        "partial": partial,
     }
 
 
 @router.post("/answer")
-def submit_answer(body: AnswerRequest, db: Session = Depends(get_db)):
+async def submit_answer(body: AnswerRequest, db: AsyncSession = Depends(get_db)):
     """
     Direct-match grading — no Gemini needed.
       MCQ:       user_answer (A/B/C/D) == correct_option
       Numerical: abs(float(user_answer) - float(correct_answer)) < 0.01
     CMS: 0.60*accuracy + 0.25*time_score + 0.15*hint_score
     """
-    question = crud.get_question_by_id(db, body.question_id)
+    question = await crud.get_question_by_id(db, body.question_id)
     if not question:
         raise HTTPException(status_code=404, detail=f"Question {body.question_id} not found")
 
-    # Learner state in background (for remediation personalisation)
-    learner_state_future: Future = _EXECUTOR.submit(get_learner_state, body.user_id)
-
     # ── Direct-match grading ───────────────────────────────────────────────────
-    question_type = question.get("question_type", "numerical")
+    options            = question.options
+    correct_option     = question.correct_option.strip()
+    correct_answer_str = question.correct_answer.strip()
 
-    raw_opts = question.get("options")
-    options: dict | None = None
-    if raw_opts:
-        try:
-            options = json.loads(raw_opts) if isinstance(raw_opts, str) else raw_opts
-        except Exception:
-            options = None
-
-    correct_option     = (question.get("correct_option") or "").strip()
-    correct_answer_str = (question.get("correct_answer") or "").strip()
-
-    if question_type == "mcq":
+    if question.question_type == "mcq":
         is_correct = body.user_answer.upper().strip() == correct_option.upper()
         if options and correct_option:
             option_text = options.get(correct_option, "")
@@ -357,11 +360,9 @@ def submit_answer(body: AnswerRequest, db: Session = Depends(get_db)):
         )
 
     # ── Fast DB ops ────────────────────────────────────────────────────────────
-    subtopics = question.get("subtopics") or []
-    if isinstance(subtopics, str):
-        subtopics = json.loads(subtopics)
+    subtopics    = question.subtopics
     concept_name = subtopics[0] if subtopics else "unknown"
-    concept_id   = _ensure_concept(db, concept_name)
+    concept_id   = await _ensure_concept(db, concept_name)
 
     cms = compute_cms(
         is_correct=is_correct,
@@ -370,35 +371,25 @@ def submit_answer(body: AnswerRequest, db: Session = Depends(get_db)):
         hint_used=body.hint_used,
     )
 
-    crud.record_attempt(
+    # Attempt insert + streak + ELO update: one statement, one round-trip
+    difficulty = question.difficulty
+    recorded = await crud.record_answer(
         db,
         user_id=body.user_id,
         question_id=body.question_id,
+        concept_id=concept_id,
+        difficulty=difficulty,
         is_correct=is_correct,
         time_taken=body.time_taken,
         retries=body.retries,
         hint_used=body.hint_used,
         cms=cms,
     )
+    old_skill, new_skill = recorded["old_skill"], recorded["new_skill"]
 
-    difficulty = question.get("difficulty", 3)
-    old_skill  = get_or_init_skill(db, body.user_id, concept_id)
-    new_skill  = update_skill(old_skill, difficulty, cms)
-    persist_skill(db, body.user_id, concept_id, new_skill)
-
-    skill_map = crud.get_all_skills(db, body.user_id)
-    skill_map[concept_name] = new_skill
-
-    streak = crud.get_incorrect_streak(db, body.user_id, body.question_id)
-    needs_remediation = should_remediate(cms, streak)
-
-    # ── Learner state + Supermemory + remediation ──────────────────────────────
-    try:
-        learner_state = learner_state_future.result(timeout=4)
-    except Exception:
-        learner_state = {}
-    learner_ctx = format_learner_context(learner_state)
+    needs_remediation = should_remediate(cms, recorded["incorrect_streak"])
 
+    # ── Supermemory + remediation ──────────────────────────────────────────────
     status  = "correct" if is_correct else "incorrect"
     summary = (
         f"Attempted '{concept_name}' (difficulty {difficulty}). "
@@ -406,24 +397,30 @@ def submit_answer(body: AnswerRequest, db: Session = Depends(get_db)):
         f"Time: {body.time_taken:.0f}s. Hint: {body.hint_used}. Retries: {body.retries}."
     )
 
-    _EXECUTOR.submit(
-        write_session_summary,
+    enqueue_session_summary(
         body.user_id, summary,
         {"concept": concept_name, "cms": str(cms), "is_correct": str(is_correct)},
     )
 
-    remediation_future: Future | None = None
-    if needs_remediation:
-        remediation_future = _EXECUTOR.submit(
-            trigger_remediation, concept_name, skill_map, learner_ctx
-        )
-
     remediation = None
-    if remediation_future is not None:
+    if needs_remediation:
+        # Only remediation needs learner state and the prerequisite skills — fetch
+        # the state in the background while the skills are read.
+        learner_state_task = asyncio.create_task(get_learner_state(body.user_id))
+        skill_map = await crud.get_all_skills(db, body.user_id)
+        skill_map[concept_name] = new_skill
         try:
-            remediation = remediation_future.result(timeout=8)
+            learner_state = await asyncio.wait_for(learner_state_task, timeout=4)
+        except Exception:
+            learner_state = {}
+        learner_ctx = format_learner_context(learner_state)
+        try:
+            remediation = await asyncio.wait_for(
+                asyncio.to_thread(trigger_remediation, concept_name, skill_map, learner_ctx),
+                timeout=8,
+            )
         except Exception as e:
-            print(f"[Remediation] failed (non-fatal): {e}")
+            logger.warning(f"[Remediation] failed (non-fatal): {e}")
 
     return {
         "user_id":        body.user_id,
@@ -453,47 +450,46 @@ class AdaptiveStartRequest(BaseModel):
 
 
 @router.post("/adaptive-start")
-def adaptive_start(body: AdaptiveStartRequest, db: Session = Depends(get_db)):
+async def adaptive_start(body: AdaptiveStartRequest, db: AsyncSession = Depends(get_db)):
     """
     Pure weak-focus session:
       1. Load full skill vector for the user
       2. Pick the concept with lowest ELO (unseen concepts = 1000, treated as neutral)
       3. Delegate to the same logic as /start
     """
-    all_concepts = get_all_concepts()
-    skill_map = crud.get_all_skills(db, body.user_id)
-
-    # Score each concept: lower ELO → higher priority
-    # Never-attempted concepts default to 1000 (neutral, not prioritised over weak ones)
-    scored = []
-    for concept in all_concepts:
-        elo = skill_map.get(concept, 1000.0)
-        scored.append((elo, concept))
-
-    scored.sort(key=lambda x: x[0])  # ascending → weakest first
-
-    # Pick the weakest concept that actually has questions in the DB
-    chosen_topic = None
-    for elo, concept in scored:
-        if crud.count_questions_by_subtopic(db, concept) > 0:
-            chosen_topic = concept
-            break
+    skill_map = await crud.get_all_skills(db, body.user_id)
+    stock = await crud.get_question_counts_by_subtopic(db)
+
+    # Weakest concept that actually has questions in the DB — one pass, no sort.
+    # Never-attempted concepts default to 1000 (neutral, not prioritised over weak ones).
+    # min() keeps the first of equal ELOs, i.e. graph order, like the old stable sort.
+    chosen_topic = min(
+        (c for c in get_all_concepts() if stock.get(c, 0) > 0),
+        key=lambda c: skill_map.get(c, 1000.0),
+        default=None,
+    )
 
     if not chosen_topic:
         raise HTTPException(status_code=404, detail="No questions available yet. Start any topic to trigger ingestion.")
 
-    # Reuse start_session logic
-    return start_session(
-        PracticeStartRequest(user_id=body.user_id, topic=chosen_topic, n=body.n),
-        db,
-    )
+    return await _run_start(db, body.user_id, chosen_topic, body.n)
 
 
 @router.get("/hint/{question_id}")
-def get_hint(question_id: int, db: Session = Depends(get_db)):
-    """Return a Gemini-generated hint for the given question without revealing the answer."""
-    q = crud.get_question_by_id(db, question_id)
+async def get_hint(question_id: int, cache: bool = True, db: AsyncSession = Depends(get_db)):
+    """
+    Return a Gemini-generated hint for the given question without revealing the answer.
+    Hints are cached per question (exact key); pass ?cache=false to force a fresh one.
+    """
+    if cache:
+        cached = llm_cache.hints.get(question_id)
+        if cached is not None:
+            return {"hint": cached}
+
+    q = await crud.get_question_by_id(db, question_id)
     if not q:
         raise HTTPException(status_code=404, detail="Question not found")
-    hint_text = generate_hint(q["text"])
+    hint_text = await asyncio.to_thread(generate_hint, q.text)
+    if hint_text != HINT_FALLBACK:
+        llm_cache.hints[question_id] = hint_text
     return {"hint": hint_text}
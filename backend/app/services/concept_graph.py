@@ -3,6 +3,7 @@ Concept Dependency Graph service.
 
 Loads the static JSON graph from app/data/concept_graph.json.
 Provides helpers to:
+  - get display metadata for a concept
   - get prerequisites for a concept
   - find the weakest prerequisite for a given user
 """
@@ -13,29 +14,53 @@ from pathlib import Path
 
 GRAPH_PATH = Path(__file__).parent.parent / "data" / "concept_graph.json"
 
+# Parsed once at import; the graph never changes while the process runs.
+_GRAPH: dict = json.loads(GRAPH_PATH.read_text())
 
-@lru_cache(maxsize=1)
-def load_graph() -> dict:
-    """Load and cache the concept dependency graph."""
-    with open(GRAPH_PATH, "r") as f:
-        return json.load(f)
 
+# Materialised once: a tuple for ordered iteration, a frozenset for O(1)
+# membership checks. Keys starting with "_" are annotations in the JSON
+# (e.g. "_comment"), not concepts.
+_CONCEPT_ORDER: tuple[str, ...] = tuple(k for k in _GRAPH if not k.startswith("_"))
+ALL_CONCEPTS: frozenset[str] = frozenset(_CONCEPT_ORDER)
 
-def get_prerequisites(concept: str) -> list[str]:
+
+def get_node(concept: str) -> dict:
+    """Raw graph entry for a concept ({} if unknown). Treat the result as read-only."""
+    return _GRAPH.get(concept) or {}
+
+
+@lru_cache(maxsize=None)
+def get_concept_meta(concept: str) -> dict:
+    """
+    Display metadata for a concept, with fallbacks already applied:
+      {"display_name": ..., "topic": ..., "subtopic": ...}
+    Cached per name, so callers get a plain dict lookup. Treat the result as read-only.
+    """
+    node = get_node(concept)
+    return {
+        "display_name": node.get("display_name", concept.replace("_", " ").title()),
+        "topic": node.get("topic", "General"),
+        "subtopic": node.get("subtopic", ""),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_prerequisites(concept: str) -> tuple[str, ...]:
     """
     Return the direct prerequisites for a concept.
+    The graph is immutable at runtime, so results are cached per name.
 
     Example:
         get_prerequisites("integration_by_parts")
-        → ["product_rule", "basic_integration"]
+        → ("product_rule", "basic_integration")
     """
-    graph = load_graph()
-    return graph.get(concept, {}).get("prerequisites", [])
+    return tuple(get_node(concept).get("prerequisites", ()))
 
 
-def get_all_concepts() -> list[str]:
-    """Return all concept keys defined in the graph."""
-    return list(load_graph().keys())
+def get_all_concepts() -> tuple[str, ...]:
+    """Return all concept keys defined in the graph, in file order."""
+    return _CONCEPT_ORDER
 
 
 def find_weak_prerequisite(concept: str, skill_map: dict[str, float]) -> str | None:
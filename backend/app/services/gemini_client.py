@@ -10,9 +10,14 @@ Used for:
   2. generate_lesson()      → 60-second micro-lesson (remediation)
   3. solve_doubt()          → step-by-step solution JSON (doubt resolution)
   4. get_embedding()        → 768-dim vector (indexing + retrieval)
+     get_topic_embedding()  → cached, single-flight async wrapper for topic queries
 """
 
+import asyncio
 import json
+from array import array
+from collections.abc import Iterable
+import threading
 import time
 import base64
 
@@ -24,6 +29,10 @@ from app.config import settings
 _model = None
 _embed_model = "models/gemini-embedding-001"
 
+# Caps concurrent Gemini API calls across all worker threads (requests, ingestion,
+# scheduler). Held only for the call itself — never across a retry sleep.
+_slots = threading.BoundedSemaphore(settings.gemini_max_concurrency)
+
 
 def _get_model():
     global _model
@@ -41,10 +50,11 @@ def _call_with_retry(prompt: str, max_retries: int = 3) -> str:
     for attempt in range(max_retries):
         try:
             model = _get_model()
-            response = model.generate_content(
-                prompt,
-                request_options={"timeout": 20},  # 20s hard timeout per call
-            )
+            with _slots:
+                response = model.generate_content(
+                    prompt,
+                    request_options={"timeout": 20},  # 20s hard timeout per call
+                )
             return response.text.strip()
         except Exception as e:
             if attempt == max_retries - 1:
@@ -64,15 +74,83 @@ def get_embedding(text: str) -> list[float]:
         return [0.0] * 768
 
     genai.configure(api_key=settings.gemini_api_key)
-    result = genai.embed_content(
-        model=_embed_model,
-        content=text,
-        task_type="retrieval_document",
-        output_dimensionality=768,
-    )
+    with _slots:
+        result = genai.embed_content(
+            model=_embed_model,
+            content=text,
+            task_type="retrieval_document",
+            output_dimensionality=768,
+        )
+    return result["embedding"]
+
+
+# Topic embeddings never change for a given model, and topics are a fixed set
+# (concept graph keys), so they are cached for the process lifetime — packed as
+# float32 arrays (3 KB each instead of ~24 KB of boxed Python floats).
+# Only touched from the event loop, so no lock.
+_topic_embeddings: dict[str, array] = {}
+_topic_embedding_tasks: dict[str, asyncio.Task] = {}
+
+
+async def get_topic_embedding(topic: str) -> list[float]:
+    """
+    Async, cached get_embedding() for a concept key (e.g. "integration_by_parts").
+    Concurrent callers for the same topic share one in-flight API call;
+    failures are not cached, so the next caller retries.
+    """
+    cached = _topic_embeddings.get(topic)
+    if cached is not None:
+        return cached.tolist()
+
+    task = _topic_embedding_tasks.get(topic)
+    if task is None:
+        task = asyncio.create_task(asyncio.to_thread(get_embedding, topic.replace("_", " ")))
+        _topic_embedding_tasks[topic] = task
+
+        def _done(t: asyncio.Task) -> None:
+            _topic_embedding_tasks.pop(topic, None)
+            if not t.cancelled() and t.exception() is None:
+                _topic_embeddings[topic] = array("f", t.result())
+
+        task.add_done_callback(_done)
+    return await asyncio.shield(task)
+
+
+_EMBED_BATCH = 100  # embed_content accepts up to 100 texts per request
+
+
+def _embed_batch(texts: list[str]) -> list[list[float]]:
+    genai.configure(api_key=settings.gemini_api_key)
+    with _slots:
+        result = genai.embed_content(
+            model=_embed_model,
+            content=texts,
+            task_type="retrieval_document",
+            output_dimensionality=768,
+        )
     return result["embedding"]
 
 
+async def warm_topic_embeddings(topics: Iterable[str]) -> None:
+    """
+    Fill the topic-embedding cache at startup — one batched API call per 100
+    topics instead of one call per first /start on each topic.
+    """
+    if not settings.gemini_api_key:
+        return
+    missing = [t for t in topics if t not in _topic_embeddings]
+    for i in range(0, len(missing), _EMBED_BATCH):
+        chunk = missing[i:i + _EMBED_BATCH]
+        try:
+            vectors = await asyncio.to_thread(_embed_batch, [t.replace("_", " ") for t in chunk])
+        except Exception as e:
+            print(f"[Gemini] topic embedding warm-up error: {e}")
+            return
+        for topic, vec in zip(chunk, vectors):
+            _topic_embeddings.setdefault(topic, array("f", vec))
+    print(f"[Gemini] Warmed {len(missing)} topic embeddings.")
+
+
 def classify_question(question_text: str) -> dict:
     """
     Classify a question into type (MCQ/numerical), subtopics, difficulty,
@@ -114,7 +192,8 @@ Only the JSON — no explanation."""
 
     try:
         model = _get_model()
-        response = model.generate_content(prompt)
+        with _slots:
+            response = model.generate_content(prompt)
         raw = response.text.strip()
         if "```" in raw:
             parts = raw.split("```")
@@ -212,10 +291,11 @@ def solve_doubt_with_image(
     try:
         model = _get_model()
         image_bytes = base64.b64decode(image_base64)
-        response = model.generate_content([
-            {"mime_type": mime_type, "data": image_bytes},
-            solve_prompt,
-        ])
+        with _slots:
+            response = model.generate_content([
+                {"mime_type": mime_type, "data": image_bytes},
+                solve_prompt,
+            ])
         raw = response.text.strip()
         if "```" in raw:
             parts = raw.split("```")
@@ -287,6 +367,10 @@ Be precise. Each step must be clear and numbered."""
         }
 
 
+# Returned when Gemini fails — callers can tell it apart and skip caching it
+HINT_FALLBACK = "Think about the key formula or identity relevant to this topic and try applying it step by step."
+
+
 def generate_hint(question_text: str, learner_context: str = "") -> str:
     """
     Generate a helpful hint for a JEE maths question WITHOUT giving away the answer.
@@ -316,7 +400,7 @@ Rules:
         return _call_with_retry(prompt)
     except Exception as e:
         print(f"[Gemini] generate_hint error: {e}")
-        return "Think about the key formula or identity relevant to this topic and try applying it step by step."
+        return HINT_FALLBACK
 
 
 def generate_questions_for_topic(topic: str, n: int = 5, learner_context: str = "") -> list[dict]:
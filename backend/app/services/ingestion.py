@@ -11,7 +11,9 @@ Flow (triggered only when Pinecone cache is insufficient):
   7. Upsert into Pinecone + Postgres
 """
 
+import asyncio
 import hashlib
+import re
 
 import requests
 from bs4 import BeautifulSoup
@@ -22,6 +24,71 @@ from app.services.gemini_client import classify_question, get_embedding
 from app.services.pinecone_client import upsert_question
 
 
+def text_fingerprint(text: str) -> str:
+    """
+    Dedup key for questions.text_hash and the Pinecone `text_hash` metadata.
+
+    Stays SHA-256: existing rows and vectors are keyed by it, so a different
+    hash would stop matching them and re-insert every question as new.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+_QUESTION_STARTERS = (
+    "find", "evaluate", "calculate", "compute", "prove", "show", "determine",
+    "if ", "let ", "for ", "given", "solve", "integrate", "differentiate",
+    "a ", "an ", "the ", "two ", "three ", "four ", "five ",
+    "which", "what", "how", "when", "using", "without", "insert", "in a ",
+    "from ", "p(", "suppose", "consider",
+)
+# LaTeX / maths markers — any one of these anywhere in the text (case-sensitive)
+_MATH_MARKERS = ("∫", "∑", "∏", "√", "²", "³", "^", "dx", "dy", "$", "\\lim", "\\int", "\\frac", "P(")
+_MATH_RE = re.compile("|".join(re.escape(m) for m in _MATH_MARKERS))
+
+# Phrases that ONLY appear in scraped article/document text, never in real questions
+_JUNK_PHRASES = (
+    "the document",
+    "this document",
+    "pdf includes",
+    "pdf contains",
+    "detailing various",
+    "includes different types",
+    "jee main and advanced exams, detailing",
+    "practice questions for",
+    "collection of questions",
+    "set of questions",
+    "the following questions",
+    "click here",
+    "download",
+    "subscribe",
+    "all rights reserved",
+)
+# All phrases in one scan of the text instead of one `in` pass per phrase
+_JUNK_RE = re.compile("|".join(re.escape(p) for p in _JUNK_PHRASES))
+
+
+def is_valid_question(text: str) -> bool:
+    """
+    Return True if text looks like a real JEE math question (not scraped article
+    text). Applied before a scraped question is classified and indexed, and again
+    to Pinecone/Gemini candidates before they are served.
+    """
+    t = text.strip()
+    if not t or len(t) < 15:
+        return False
+    # Reject obviously long article text (real questions are usually < 450 chars)
+    if len(t) > 450:
+        return False
+    t_lower = t.lower()
+    # Accept if it ends with "?", starts with a known question word/pattern
+    # (tuple → one C-level call), or contains LaTeX math markers / math symbols.
+    # Cheapest test first; the junk scan below only runs for texts that pass.
+    if not (t.endswith("?") or t_lower.startswith(_QUESTION_STARTERS) or _MATH_RE.search(t)):
+        return False
+    # Reject known article/document description patterns (very specific phrases only)
+    return not _JUNK_RE.search(t_lower)
+
+
 def ingest_topic(topic: str, n: int = 10) -> list[dict]:
     """
     Ingest up to `n` new questions for the given topic from the web.
@@ -59,19 +126,10 @@ def ingest_topic(topic: str, n: int = 10) -> list[dict]:
     seen_hashes = set()
 
     for q in raw_questions:
+        # Already through is_valid_question in _extract_questions_from_text —
+        # junk never costs a Gemini call
         text = q["text"].strip()
-        if len(text) < 20:
-            continue
-        # Reject article descriptions before expensive Gemini calls
-        text_lower = text.lower()
-        if any(p in text_lower for p in (
-            "the document", "this document", "pdf includes", "pdf contains",
-            "detailing various", "series of", "includes different types",
-            "jee main and advanced exam", "practice questions for",
-        )):
-            continue
-
-        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        text_hash = text_fingerprint(text)
         if text_hash in seen_hashes:
             continue
         seen_hashes.add(text_hash)
@@ -114,6 +172,41 @@ def ingest_topic(topic: str, n: int = 10) -> list[dict]:
     return ingested
 
 
+# topic → in-flight ingest. Only touched from the event loop, so no lock.
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+def start_ingest(topic: str, n: int = 10) -> asyncio.Task:
+    """
+    Start an ingest for `topic` in a worker thread, or return the one already
+    running. Doesn't wait: _in_flight keeps the task alive until it finishes.
+    """
+    task = _in_flight.get(topic)
+    if task is None:
+        task = asyncio.create_task(asyncio.to_thread(ingest_topic, topic, n))
+        _in_flight[topic] = task
+        task.add_done_callback(lambda t: _ingest_done(topic, t))
+    return task
+
+
+def _ingest_done(topic: str, task: asyncio.Task) -> None:
+    _in_flight.pop(topic, None)
+    # Retrieve the exception so fire-and-forget runs don't warn at GC time
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[Ingestion] background ingest for '{topic}' failed: {task.exception()}")
+
+
+async def ingest_topic_once(topic: str, n: int = 10) -> list[dict]:
+    """
+    Async entry point for ingest_topic() that coalesces concurrent calls:
+    if an ingest for `topic` is already running, await that one instead of
+    starting another Tavily + Gemini run. Joiners get the leader's result
+    (and its `n`). The shared run is shielded, so one caller disconnecting
+    doesn't cancel it for the others.
+    """
+    return await asyncio.shield(start_ingest(topic, n))
+
+
 def _build_queries(topic: str) -> list[str]:
     """Generate search query variants for the given topic."""
     readable = topic.replace("_", " ")
@@ -129,8 +222,6 @@ def _extract_questions_from_text(content: str, source_url: str) -> list[dict]:
     Heuristic extraction of question-like sentences from raw text content.
     Splits on both newlines and sentence boundaries for richer extraction.
     """
-    import re
-
     questions = []
 
     # Split on lines first, then also on sentence boundaries within long lines
@@ -146,55 +237,16 @@ def _extract_questions_from_text(content: str, source_url: str) -> list[dict]:
         else:
             candidates.append(line)
 
-    math_indicators = [
-        "∫", "∑", "∏", "√", "→", "≤", "≥", "≠", "∞",
-        "$", "^2", "^3", "lim(", "lim_", "dx", "dy", "dz",
-        "sin(", "cos(", "tan(", "cot(", "sec(", "log(", "ln(", "f(x)",
-        "matrix", "determinant", "vector",
-        "eccentricity", "foci", "focus", "ellipse", "parabola", "hyperbola",
-        "chord", "tangent", "asymptote", "directrix",
-        "integral", "derivative", "differentia", "integra",
-        "polynomial", "quadratic", "roots", "coefficient",
-        "complex number", "modulus", "argument",
-        "probability", "binomial", "permutation", "combination",
-        "progression", "sequence", "series",
-    ]
-
-    question_starters = (
-        "find", "evaluate", "calculate", "compute", "prove", "show", "determine",
-        "if ", "let ", "for ", "given", "solve", "integrate", "differentiate",
-        "a ", "an ", "the ", "two ", "three ", "suppose", "consider", "from ",
-        "which", "what", "how", "when", "using", "without", "in a ", "p(",
-    )
-
-    junk_phrases = (
-        "the document contains", "this document", "pdf includes", "pdf contains",
-        "detailing various", "includes different types", "collection of",
-        "set of questions", "click here", "download", "subscribe",
-        "all rights reserved", "the following questions",
-    )
-
     seen: set[str] = set()
     for cand in candidates:
         cand = cand.strip()
-        if len(cand) < 20 or len(cand) > 600:
+        # Same accept/junk rules ingest_topic and /start apply — one source of truth
+        if len(cand) < 20 or not is_valid_question(cand):
             continue
-        lower = cand.lower()
-        if any(p in lower for p in junk_phrases):
-            continue
-        key = lower[:60]
+        key = cand.lower()[:60]
         if key in seen:
             continue
-        if cand.endswith("?"):
-            seen.add(key)
-            questions.append({"text": cand, "source_url": source_url})
-            continue
-        if any(lower.startswith(s) for s in question_starters):
-            seen.add(key)
-            questions.append({"text": cand, "source_url": source_url})
-            continue
-        if any(ind in cand for ind in math_indicators):
-            seen.add(key)
-            questions.append({"text": cand, "source_url": source_url})
+        seen.add(key)
+        questions.append({"text": cand, "source_url": source_url})
 
     return questions
@@ -0,0 +1,48 @@
+"""
+In-process TTL caches for Gemini outputs that are safe to reuse verbatim.
+
+Exact keys only — no embedding-similarity tier: two maths questions that embed
+almost identically can still need completely different answers, so a
+"near hit" would serve wrong content.
+
+Only touched from the event loop, so no locking.
+"""
+
+import hashlib
+import re
+
+from cachetools import TTLCache
+
+_TTL_SECONDS = 7 * 24 * 3600   # questions never change once stored
+
+_WS_RE = re.compile(r"\s+")
+
+# question_id → hint text
+hints: TTLCache = TTLCache(maxsize=4096, ttl=_TTL_SECONDS)
+
+# doubt_key() / doubt_image_key() → solve_doubt() / solve_doubt_with_image() result
+doubt_solutions: TTLCache = TTLCache(maxsize=2048, ttl=_TTL_SECONDS)
+
+
+def _normalise(s: str) -> str:
+    # Whitespace only — case carries meaning in maths (X vs x, P(A) vs p(a)).
+    return _WS_RE.sub(" ", s.strip())
+
+
+def _digest(*parts: str) -> str:
+    """16-byte BLAKE2b — cheaper than SHA-256 and plenty for a cache key."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\x00")   # keep ("ab", "c") and ("a", "bc") distinct
+    return h.hexdigest()
+
+
+def doubt_key(question_text: str, student_attempt: str) -> str:
+    """Key for a text doubt — whitespace-collapsed first, case preserved."""
+    return _digest("text", _normalise(question_text), _normalise(student_attempt))
+
+
+def doubt_image_key(image_base64: str, student_attempt: str) -> str:
+    """Key for an image doubt — base64 is case-sensitive, so it is hashed as-is."""
+    return _digest("img", image_base64, _normalise(student_attempt))
@@ -5,11 +5,13 @@ Free tier: 1 index, 100k vectors — plenty for MVP.
 Index dimension: 768 (Gemini text-embedding-004)
 
 Operations:
+  - warm_up()  → create the shared index handle at app startup
   - upsert_question(question_id, embedding, metadata)
-  - query_questions(subtopic, difficulty, n) → list of question records
+  - query_questions(subtopic, query_embedding, ...) → list of question records
 """
 
 from functools import lru_cache
+import threading
 
 from pinecone import Pinecone, ServerlessSpec
 
@@ -18,6 +20,9 @@ from app.config import settings
 EMBEDDING_DIMENSION = 768
 METRIC = "cosine"
 
+# Caps concurrent Pinecone data-plane calls across worker threads
+_slots = threading.BoundedSemaphore(settings.pinecone_max_concurrency)
+
 
 @lru_cache(maxsize=1)
 def _get_index():
@@ -40,6 +45,18 @@ def _get_index():
     return pc.Index(settings.pinecone_index_name)
 
 
+def warm_up() -> None:
+    """
+    Build the cached index handle and open its connection at startup, so the
+    first /practice/start doesn't pay list_indexes + TLS setup on the request path.
+    """
+    try:
+        _get_index().describe_index_stats()
+        print("[Pinecone] Index handle warmed up.")
+    except Exception as e:
+        print(f"[Pinecone] warm-up skipped: {e}")
+
+
 def upsert_question(
     question_id: str,
     embedding: list[float],
@@ -55,7 +72,8 @@ def upsert_question(
     """
     try:
         index = _get_index()
-        index.upsert(vectors=[{"id": question_id, "values": embedding, "metadata": metadata}])
+        with _slots:
+            index.upsert(vectors=[{"id": question_id, "values": embedding, "metadata": metadata}])
         return True
     except Exception as e:
         print(f"[Pinecone] upsert_question error: {e}")
@@ -67,10 +85,13 @@ def query_questions(
     query_embedding: list[float],
     difficulty: int | None = None,
     n: int = 5,
+    difficulty_range: tuple[int, int] | None = None,
+    exclude_hashes: list[str] | None = None,
 ) -> list[dict]:
     """
     Retrieve questions semantically similar to query_embedding,
-    filtered by subtopic (and optionally difficulty).
+    filtered by subtopic (and optionally difficulty / an inclusive difficulty
+    range, and excluding vectors whose `text_hash` is in exclude_hashes).
 
     Returns list of metadata dicts for matching questions.
     """
@@ -79,13 +100,18 @@ def query_questions(
         filter_expr: dict = {"subtopics": {"$in": [subtopic]}}
         if difficulty is not None:
             filter_expr["difficulty"] = {"$eq": difficulty}
-
-        results = index.query(
-            vector=query_embedding,
-            top_k=n,
-            filter=filter_expr,
-            include_metadata=True,
-        )
+        elif difficulty_range is not None:
+            filter_expr["difficulty"] = {"$gte": difficulty_range[0], "$lte": difficulty_range[1]}
+        if exclude_hashes:
+            filter_expr["text_hash"] = {"$nin": exclude_hashes}
+
+        with _slots:
+            results = index.query(
+                vector=query_embedding,
+                top_k=n,
+                filter=filter_expr,
+                include_metadata=True,
+            )
         return [match["metadata"] for match in results.get("matches", [])]
     except Exception as e:
         print(f"[Pinecone] query_questions error: {e}")
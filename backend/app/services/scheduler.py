@@ -8,11 +8,11 @@ Jobs:
 """
 
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from app.services.concept_graph import get_all_concepts
-from app.services.ingestion import ingest_topic
+from app.services.ingestion import ingest_topic_once
 
 logger = logging.getLogger(__name__)
 
@@ -21,42 +21,38 @@ _MIN_QUESTIONS_PER_TOPIC = 10
 _INGEST_BATCH = 8   # how many new questions to fetch per run
 
 
-def _enrich_weak_topics() -> None:
-    """Fetch Postgres connection inside the job to avoid cross-thread session issues."""
+async def _enrich_weak_topics() -> None:
+    """Open a session inside the job; ingest_topic_once runs the blocking ingest in a thread."""
     try:
+        from app.crud import get_question_counts_by_subtopic
         from app.db import SessionLocal
-        from sqlalchemy import text
 
-        db = SessionLocal()
-        try:
-            all_concepts = get_all_concepts()
-            for concept in all_concepts:
-                row = db.execute(
-                    text("SELECT COUNT(*) FROM questions WHERE subtopics::text ILIKE :s"),
-                    {"s": f"%{concept}%"},
-                ).fetchone()
-                count = int(row[0]) if row else 0
-                if count < _MIN_QUESTIONS_PER_TOPIC:
-                    logger.info(f"[Scheduler] Enriching '{concept}' (only {count} questions)…")
-                    try:
-                        new_qs = ingest_topic(concept, n=_INGEST_BATCH)
-                        logger.info(f"[Scheduler] Ingested {len(new_qs)} questions for '{concept}'")
-                    except Exception as exc:
-                        logger.warning(f"[Scheduler] Ingest failed for '{concept}': {exc}")
-        finally:
-            db.close()
+        # One grouped count, then release the connection before the slow ingests
+        async with SessionLocal() as db:
+            stock = await get_question_counts_by_subtopic(db)
+
+        for concept in get_all_concepts():
+            count = stock.get(concept, 0)
+            if count < _MIN_QUESTIONS_PER_TOPIC:
+                logger.info(f"[Scheduler] Enriching '{concept}' (only {count} questions)…")
+                try:
+                    new_qs = await ingest_topic_once(concept, n=_INGEST_BATCH)
+                    logger.info(f"[Scheduler] Ingested {len(new_qs)} questions for '{concept}'")
+                except Exception as exc:
+                    logger.warning(f"[Scheduler] Ingest failed for '{concept}': {exc}")
     except Exception as exc:
         logger.error(f"[Scheduler] Job error: {exc}")
 
 
-_scheduler: BackgroundScheduler | None = None
+_scheduler: AsyncIOScheduler | None = None
 
 
 def start_scheduler() -> None:
     global _scheduler
     if _scheduler and _scheduler.running:
         return
-    _scheduler = BackgroundScheduler(daemon=True)
+    # Must be started from inside the running event loop (the app lifespan).
+    _scheduler = AsyncIOScheduler()
     _scheduler.add_job(
         _enrich_weak_topics,
         trigger=IntervalTrigger(hours=24),
@@ -2,19 +2,44 @@
 Supermemory.ai client.
 
 REST API wrapper for:
-  - get_learner_state(user_id)  → retrieve stored behavioral memory
+  - get_learner_state(user_id)  → retrieve stored behavioral memory (async)
   - write_session_summary(user_id, summary)  → upsert new summary
+  - enqueue_session_summary(...)  → same, via the background writer thread
 
 Free tier: https://supermemory.ai
 API docs: https://docs.supermemory.ai
 """
 
+import queue
+import threading
+
 import httpx
+from cachetools import TTLCache
 
 from app.config import settings
 
 BASE_URL = "https://api.supermemory.ai/v3"
 
+# One pooled client for the process: keep-alive connections mean only the first
+# call pays the TCP + TLS handshake. httpx.Client is safe to share across the
+# worker threads these sync helpers run in.
+_client = httpx.Client(
+    base_url=BASE_URL,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
+# Request handlers read learner state on the event loop itself — no thread hop.
+_aclient = httpx.AsyncClient(
+    base_url=BASE_URL,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
+
+
+async def aclose() -> None:
+    """Close the async client's pooled connections (app shutdown)."""
+    await _aclient.aclose()
+
 
 def _headers() -> dict:
     return {
@@ -23,31 +48,42 @@ def _headers() -> dict:
     }
 
 
-def get_learner_state(user_id: int) -> dict:
+# user_id → derived learner state. It summarises the last few sessions, so a
+# 30s-old copy is as good as a fresh one; summaries written since then show up
+# on the next fetch. Only touched from the event loop, so no lock.
+_learner_states: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+async def get_learner_state(user_id: int) -> dict:
     """
     Retrieve the learner's behavioral memory from Supermemory.
 
     Searches for past session summaries and derives:
       weak_concepts, hint_dependency from stored metadata.
     Falls back to empty defaults if no memory exists yet.
+    Successful lookups are cached per user for 30s; treat the result as read-only.
     """
     if not settings.supermemory_api_key:
         return _default_state()
+    cached = _learner_states.get(user_id)
+    if cached is not None:
+        return cached
 
     try:
-        response = httpx.get(
-            f"{BASE_URL}/documents",
+        response = await _aclient.get(
+            "/documents",
             headers=_headers(),
             params={"q": f"user_id:{user_id} Attempted", "limit": 10},
             timeout=3.0,
-            follow_redirects=True,
         )
         response.raise_for_status()
         data = response.json()
         results = data.get("results", data.get("documents", []))
 
         if not results:
-            return _default_state()
+            state = _default_state()
+            _learner_states[user_id] = state
+            return state
 
         # Mine metadata from stored session summaries
         weak_concepts: set[str] = set()
@@ -69,11 +105,13 @@ def get_learner_state(user_id: int) -> dict:
         elif total > 0 and hint_count / total > 0.25:
             hint_dep = "medium"
 
-        return {
+        state = {
             "weak_concepts": list(weak_concepts)[:5],  # top 5 weak areas
             "slow_solver": False,
             "hint_dependency": hint_dep,
         }
+        _learner_states[user_id] = state
+        return state
     except Exception as e:
         print(f"[Supermemory] get_learner_state error: {e}")
         return _default_state()
@@ -104,12 +142,11 @@ def write_session_summary(user_id: int, summary: str, metadata: dict = None) ->
     }
 
     try:
-        response = httpx.post(
-            f"{BASE_URL}/documents",
+        response = _client.post(
+            "/documents",
             headers=_headers(),
             json=payload,
             timeout=10.0,
-            follow_redirects=True,
         )
         response.raise_for_status()
         return True
@@ -118,6 +155,52 @@ def write_session_summary(user_id: int, summary: str, metadata: dict = None) ->
         return False
 
 
+# Session summaries are telemetry: request handlers enqueue them and one daemon
+# thread posts them, so a slow Supermemory never holds a request-path worker.
+# When the queue is full new summaries are dropped rather than applying backpressure.
+_summary_queue: queue.Queue = queue.Queue(maxsize=1000)
+_STOP = object()
+_summary_thread: threading.Thread | None = None
+
+
+def _summary_worker() -> None:
+    while True:
+        item = _summary_queue.get()
+        if item is _STOP:
+            return
+        write_session_summary(*item)
+
+
+def start_summary_writer() -> None:
+    global _summary_thread
+    if _summary_thread is None:
+        _summary_thread = threading.Thread(target=_summary_worker, name="supermemory-writer", daemon=True)
+        _summary_thread.start()
+
+
+def stop_summary_writer(timeout: float = 5.0) -> None:
+    """Let the writer drain what is already queued (bounded by `timeout`), then stop it."""
+    global _summary_thread
+    if _summary_thread is None:
+        return
+    try:
+        _summary_queue.put(_STOP, timeout=timeout)
+    except queue.Full:
+        pass
+    _summary_thread.join(timeout)
+    _summary_thread = None
+
+
+def enqueue_session_summary(user_id: int, summary: str, metadata: dict = None) -> bool:
+    """Queue write_session_summary() for the writer thread; False if it was dropped."""
+    try:
+        _summary_queue.put_nowait((user_id, summary, metadata))
+        return True
+    except queue.Full:
+        print("[Supermemory] summary queue full — dropping write.")
+        return False
+
+
 def _default_state() -> dict:
     return {
         "weak_concepts": [],
@@ -152,12 +235,11 @@ def get_learner_context_string(user_id: int) -> str:
     if not settings.supermemory_api_key:
         return ""
     try:
-        response = httpx.get(
-            f"{BASE_URL}/memories/search",
+        response = _client.get(
+            "/memories/search",
             headers=_headers(),
             params={"q": f"user {user_id} learning behaviour weak concepts", "limit": 3},
             timeout=8.0,
-            follow_redirects=True,
         )
         response.raise_for_status()
         data = response.json()
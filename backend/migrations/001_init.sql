@@ -36,7 +36,7 @@ CREATE TABLE IF NOT EXISTS questions (
     id              SERIAL PRIMARY KEY,
     text            TEXT        NOT NULL,
     question_type   TEXT        NOT NULL DEFAULT 'numerical' CHECK (question_type IN ('mcq', 'numerical')),
-    options         TEXT        DEFAULT NULL,  -- JSON string: {"A":"...","B":"...","C":"...","D":"..."}
+    options         JSONB       DEFAULT NULL,  -- {"A":"...","B":"...","C":"...","D":"..."}
     correct_option  TEXT        DEFAULT NULL,  -- 'A'/'B'/'C'/'D' for MCQ
     correct_answer  TEXT        DEFAULT NULL,  -- numeric string for numerical, option letter for MCQ
     subtopics       JSONB       NOT NULL DEFAULT '[]',  -- ["integration_by_parts"]
@@ -62,15 +62,49 @@ CREATE TABLE IF NOT EXISTS attempts (
 -- Index for fast skill lookups
 CREATE INDEX IF NOT EXISTS idx_user_skill_lookup ON user_skill(user_id, concept_id);
 CREATE INDEX IF NOT EXISTS idx_attempts_user     ON attempts(user_id, created_at DESC);
-CREATE INDEX IF NOT EXISTS idx_questions_hash    ON questions(text_hash);
+-- (user_id, question_id) prefix serves seen-question lookups; created_at orders the streak scan
+CREATE INDEX IF NOT EXISTS idx_attempts_user_q_time ON attempts(user_id, question_id, created_at DESC);
 
 -- Add MCQ/numerical fields to existing questions table (idempotent)
 ALTER TABLE questions
     ADD COLUMN IF NOT EXISTS question_type  TEXT DEFAULT 'numerical'
         CHECK (question_type IN ('mcq', 'numerical')),
-    ADD COLUMN IF NOT EXISTS options        TEXT DEFAULT NULL,
+    ADD COLUMN IF NOT EXISTS options        JSONB DEFAULT NULL,
     ADD COLUMN IF NOT EXISTS correct_option TEXT DEFAULT NULL,
     ADD COLUMN IF NOT EXISTS correct_answer TEXT DEFAULT NULL;
 
 -- Remove confidence from attempts if it exists (idempotent)
 ALTER TABLE attempts DROP COLUMN IF EXISTS confidence;
+
+-- Subtopic lookups use JSONB containment (subtopics @> '["concept"]'), served by GIN
+CREATE INDEX IF NOT EXISTS idx_questions_subtopics ON questions USING gin (subtopics jsonb_path_ops);
+
+-- ELO skill update — the only implementation; /practice/answer applies it in
+-- crud.record_answer's upsert.
+--   item_rating = 1000 + (difficulty - 1) * 200
+--   expected    = 1 / (1 + 10 ^ ((item_rating - skill) / 400))
+--   new_skill   = skill + 20 * (cms - expected), rounded to 4 dp
+CREATE OR REPLACE FUNCTION elo_update(skill FLOAT, difficulty INT, cms FLOAT)
+RETURNS FLOAT LANGUAGE sql IMMUTABLE AS $$
+    SELECT round(
+        ($1 + 20.0 * ($3 - 1.0 / (1.0 + power(10.0, ((1000 + ($2 - 1) * 200) - $1) / 400.0))))::numeric,
+        4
+    )::float
+$$;
+
+-- text_hash is UNIQUE, so its constraint index already serves hash lookups;
+-- the separate idx_questions_hash duplicated it.
+DROP INDEX IF EXISTS idx_questions_hash;
+
+-- options used to be a TEXT column holding JSON; store it as JSONB so the driver
+-- hands back a dict instead of every read json.loads()-ing it. Guarded so the
+-- table is only rewritten once.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'questions' AND column_name = 'options' AND data_type = 'text'
+    ) THEN
+        ALTER TABLE questions ALTER COLUMN options TYPE JSONB USING NULLIF(options, '')::jsonb;
+    END IF;
+END $$;